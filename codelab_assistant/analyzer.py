@@ -6,6 +6,13 @@
 
 import os
 import re
+from functools import lru_cache
+
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
 
 
 # Поддерживаемые языки и их расширения
@@ -18,6 +25,12 @@ LANGUAGE_EXTENSIONS = {
     ".c": "cpp",
 }
 
+# Расширения в нижнем и верхнем регистре — для поиска без .lower()
+_EXTENSION_LOOKUP = dict(LANGUAGE_EXTENSIONS)
+_EXTENSION_LOOKUP.update(
+    {ext.upper(): language for ext, language in LANGUAGE_EXTENSIONS.items()}
+)
+
 # Паттерны комментариев для каждого языка
 COMMENT_PATTERNS = {
     "pascal": {
@@ -37,6 +50,44 @@ COMMENT_PATTERNS = {
     },
 }
 
+# Регулярные выражения для извлечения комментариев: одно выражение
+# на язык, все виды комментариев извлекаются за один проход.
+# Флаги заданы внутри шаблонов, чтобы их принимали и re, и re2
+_COMMENT_PATTERNS = {
+    "pascal": (
+        r"(?s)\{(?P<brace>[^}]*)\}"
+        r"|\(\*(?P<paren>.*?)\*\)"
+        r"|//(?P<line>[^\n]*)"
+    ),
+    "python": (
+        r"(?s)#(?P<hash>[^\n]*)"
+        r'|"""(?P<triple_d>.*?)"""'
+        r"|'''(?P<triple_s>.*?)'''"
+    ),
+    "cpp": (
+        r"(?s)//(?P<line>[^\n]*)"
+        r"|/\*(?P<block>.*?)\*/"
+    ),
+}
+
+_COMMENT_REGEXES = {
+    language: re.compile(pattern)
+    for language, pattern in _COMMENT_PATTERNS.items()
+}
+
+# Для больших файлов используется движок re2 (если установлен):
+# его линейный по времени автомат быстрее на длинных текстах,
+# а на коротких выигрыш съедают накладные расходы вызова
+RE2_MIN_SIZE = 64 * 1024
+
+_COMMENT_REGEXES_RE2 = {}
+if RE2_AVAILABLE:
+    for _language, _pattern in _COMMENT_PATTERNS.items():
+        try:
+            _COMMENT_REGEXES_RE2[_language] = re2.compile(_pattern)
+        except re2.error:
+            pass
+
 # Ключевые слова для определения алгоритмов
 ALGORITHM_KEYWORDS = {
     "сортировка": ["sort", "bubble", "quick", "merge", "insertion", "selection"],
@@ -49,6 +100,35 @@ ALGORITHM_KEYWORDS = {
     "математика": ["math", "sqrt", "pow", "abs", "sin", "cos"],
 }
 
+# Обратное отображение: ключевое слово -> алгоритмическая концепция
+_KEYWORD_TO_ALGORITHM = {
+    keyword: algorithm_name
+    for algorithm_name, keywords in ALGORITHM_KEYWORDS.items()
+    for keyword in keywords
+}
+
+# Все ключевые слова в одном выражении. Просмотр вперёд находит
+# вхождения, начинающиеся в каждой позиции, в том числе перекрывающиеся,
+# так что поиск эквивалентен проверке каждой подстроки по отдельности
+_ALGORITHM_RE = re.compile(
+    "(?=("
+    + "|".join(
+        re.escape(keyword)
+        for keyword in sorted(_KEYWORD_TO_ALGORITHM, key=len, reverse=True)
+    )
+    + "))",
+    re.IGNORECASE | re.ASCII,
+)
+
+
+# Ключевые слова, по которым комментарий распознаётся как описание цели
+_PURPOSE_KEYWORDS = (
+    "цель", "задание", "задача", "лабораторная",
+    "purpose", "task", "lab", "objective",
+)
+
+_PURPOSE_RE = re.compile("|".join(_PURPOSE_KEYWORDS), re.IGNORECASE)
+
 
 def detect_language(filepath):
     """Определяет язык программирования по расширению файла.
@@ -59,13 +139,22 @@ def detect_language(filepath):
     Returns:
         Название языка ('pascal', 'python', 'cpp') или None.
     """
-    ext = os.path.splitext(filepath)[1].lower()
-    return LANGUAGE_EXTENSIONS.get(ext)
+    ext = os.path.splitext(filepath)[1]
+    language = _EXTENSION_LOOKUP.get(ext)
+    if language is None and ext:
+        # Смешанный регистр (например, .Pas)
+        language = LANGUAGE_EXTENSIONS.get(ext.lower())
+    return language
 
 
 def extract_comments(code, language):
     """Извлекает комментарии из исходного кода.
 
+    Комментарии возвращаются в порядке следования в исходном коде.
+    Маркеры комментариев внутри другого комментария (например, # внутри
+    строки в тройных кавычках или // внутри /* ... */) отдельными
+    комментариями не считаются.
+
     Args:
         code: Строка с исходным кодом.
         language: Язык программирования.
@@ -73,39 +162,19 @@ def extract_comments(code, language):
     Returns:
         Список строк-комментариев.
     """
-    comments = []
-
-    if language == "pascal":
-        # Комментарии в фигурных скобках
-        for match in re.finditer(r"\{([^}]*)\}", code):
-            comments.append(match.group(1).strip())
-        # Комментарии (* ... *)
-        for match in re.finditer(r"\(\*(.*?)\*\)", code, re.DOTALL):
-            comments.append(match.group(1).strip())
-        # Однострочные комментарии //
-        for match in re.finditer(r"//(.*)$", code, re.MULTILINE):
-            comments.append(match.group(1).strip())
-
-    elif language == "python":
-        # Однострочные комментарии #
-        for match in re.finditer(r"#(.*)$", code, re.MULTILINE):
-            comments.append(match.group(1).strip())
-        # Многострочные строки-комментарии """..."""
-        for match in re.finditer(r'"""(.*?)"""', code, re.DOTALL):
-            comments.append(match.group(1).strip())
-        # Многострочные строки-комментарии '''...'''
-        for match in re.finditer(r"'''(.*?)'''", code, re.DOTALL):
-            comments.append(match.group(1).strip())
-
-    elif language == "cpp":
-        # Однострочные комментарии //
-        for match in re.finditer(r"//(.*)$", code, re.MULTILINE):
-            comments.append(match.group(1).strip())
-        # Многострочные комментарии /* ... */
-        for match in re.finditer(r"/\*(.*?)\*/", code, re.DOTALL):
-            comments.append(match.group(1).strip())
-
-    return [c for c in comments if c]
+    pattern = None
+    if len(code) >= RE2_MIN_SIZE:
+        pattern = _COMMENT_REGEXES_RE2.get(language)
+    if pattern is None:
+        pattern = _COMMENT_REGEXES.get(language)
+    if pattern is None:
+        return []
+
+    return [
+        comment
+        for match in pattern.finditer(code)
+        if (comment := (match.group(match.lastgroup) or "").strip())
+    ]
 
 
 def detect_algorithms(code):
@@ -117,42 +186,31 @@ def detect_algorithms(code):
     Returns:
         Список названий обнаруженных алгоритмических концепций.
     """
-    code_lower = code.lower()
-    detected = []
+    found = set()
 
-    for algorithm_name, keywords in ALGORITHM_KEYWORDS.items():
-        for keyword in keywords:
-            if keyword in code_lower:
-                detected.append(algorithm_name)
-                break
+    for match in _ALGORITHM_RE.finditer(code):
+        found.add(_KEYWORD_TO_ALGORITHM[match.group(1).lower()])
+        if len(found) == len(ALGORITHM_KEYWORDS):
+            break
 
-    return detected
+    # Сохраняем порядок концепций из ALGORITHM_KEYWORDS
+    return [name for name in ALGORITHM_KEYWORDS if name in found]
 
 
-def extract_purpose(code, language, filepath):
+def extract_purpose(comments, filepath):
     """Определяет цель программы из комментариев или имени файла.
 
     Args:
-        code: Строка с исходным кодом.
-        language: Язык программирования.
+        comments: Список комментариев (из extract_comments).
         filepath: Путь к файлу.
 
     Returns:
         Строка с описанием цели работы.
     """
-    comments = extract_comments(code, language)
-
     # Ищем комментарий, похожий на описание цели
-    purpose_keywords = [
-        "цель", "задание", "задача", "лабораторная",
-        "purpose", "task", "lab", "objective",
-    ]
-
     for comment in comments:
-        comment_lower = comment.lower()
-        for keyword in purpose_keywords:
-            if keyword in comment_lower:
-                return comment
+        if _PURPOSE_RE.search(comment):
+            return comment
 
     # Если в комментариях не нашли — берём первый комментарий
     if comments:
@@ -180,6 +238,35 @@ def get_language_display_name(language):
     return names.get(language, language)
 
 
+@lru_cache(maxsize=64)
+def _analyze_cached(path, language, mtime_ns, size):
+    """Анализирует файл; результат кэшируется по (путь, mtime, размер).
+
+    Args:
+        path: Абсолютный путь к файлу.
+        language: Язык программирования.
+        mtime_ns: Время изменения файла в наносекундах.
+        size: Размер файла в байтах.
+
+    Returns:
+        Словарь с результатами анализа (см. analyze_code).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        code = f.read()
+
+    comments = extract_comments(code, language)
+
+    return {
+        "language": language,
+        "language_display": get_language_display_name(language),
+        "comments": comments,
+        "algorithms": detect_algorithms(code),
+        "purpose": extract_purpose(comments, path),
+        "code": code,
+        "filename": os.path.basename(path),
+    }
+
+
 def analyze_code(filepath):
     """Полный анализ исходного кода.
 
@@ -203,15 +290,13 @@ def analyze_code(filepath):
             f"Поддерживаются: {', '.join(LANGUAGE_EXTENSIONS.keys())}"
         )
 
-    with open(filepath, "r", encoding="utf-8") as f:
-        code = f.read()
+    path = os.path.abspath(filepath)
+    st = os.stat(path)
+    cached = _analyze_cached(path, language, st.st_mtime_ns, st.st_size)
 
-    return {
-        "language": language,
-        "language_display": get_language_display_name(language),
-        "comments": extract_comments(code, language),
-        "algorithms": detect_algorithms(code),
-        "purpose": extract_purpose(code, language, filepath),
-        "code": code,
-        "filename": os.path.basename(filepath),
-    }
+    # Вызывающий код дополняет результат (например, task_label),
+    # поэтому возвращаем копию, не затрагивая кэш
+    result = dict(cached)
+    result["comments"] = list(cached["comments"])
+    result["algorithms"] = list(cached["algorithms"])
+    return result
@@ -6,22 +6,23 @@
 import argparse
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
-from .analyzer import analyze_code
-from .executor import run_tests
-from .flowchart import generate_flowchart, generate_mermaid_code, save_mermaid_code
-from .profiles import list_profiles, load_profile, save_profile
-from .report_generator import generate_report
+# Модули анализа, запуска и генерации отчета (docx, pygments, graphviz)
+# импортируются в обработчиках команд, чтобы `profiles` и `--help`
+# не тратили время на их загрузку.
 
+# Максимальное число потоков для параллельной обработки файлов заданий
+MAX_WORKERS = 8
 
-def parse_args(args=None):
-    """Разбирает аргументы командной строки.
 
-    Args:
-        args: Список аргументов (по умолчанию sys.argv).
+@lru_cache(maxsize=1)
+def _get_parser():
+    """Создает парсер аргументов командной строки (один раз за процесс).
 
     Returns:
-        Объект с разобранными аргументами.
+        Объект argparse.ArgumentParser.
     """
     parser = argparse.ArgumentParser(
         prog="codelab",
@@ -112,7 +113,19 @@ def parse_args(args=None):
         help="Имя профиля",
     )
 
-    return parser.parse_args(args)
+    return parser
+
+
+def parse_args(args=None):
+    """Разбирает аргументы командной строки.
+
+    Args:
+        args: Список аргументов (по умолчанию sys.argv).
+
+    Returns:
+        Объект с разобранными аргументами.
+    """
+    return _get_parser().parse_args(args)
 
 
 def _load_test_data(args):
@@ -132,11 +145,12 @@ def _load_test_data(args):
 
     # Из файла
     if args.test_file and os.path.exists(args.test_file):
+        from .executor import split_test_cases
+
         with open(args.test_file, "r", encoding="utf-8") as f:
             content = f.read()
-        # Разделяем тесты по '---'
-        parts = content.split("---")
-        test_cases.extend(part.strip() for part in parts if part.strip())
+        # Разделяем тесты по строкам '---'
+        test_cases.extend(split_test_cases(content))
 
     return test_cases
 
@@ -152,6 +166,8 @@ def _save_mermaid_alongside(output_path, mermaid_code, suffix=""):
     Returns:
         Путь к сохранённому файлу или None.
     """
+    from .flowchart import save_mermaid_code
+
     if not mermaid_code or not output_path:
         return None
     base = os.path.splitext(output_path)[0]
@@ -168,6 +184,11 @@ def cmd_generate(args):
     Returns:
         Код возврата (0 — успех).
     """
+    from .analyzer import analyze_code
+    from .executor import run_tests
+    from .flowchart import generate_flowchart_and_mermaid
+    from .report_generator import generate_report
+
     source_file = args.source_file
 
     if not os.path.exists(source_file):
@@ -186,12 +207,23 @@ def cmd_generate(args):
     # Подписи к файлам
     labels = list(args.labels) if args.labels else []
 
-    # Анализируем все файлы
+    workers = min(MAX_WORKERS, len(all_files))
+
+    # Анализируем все файлы (параллельно — файлы независимы);
+    # повторно указанный файл анализируется один раз
+    futures_by_path = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for fpath in all_files:
+            key = os.path.abspath(fpath)
+            if key not in futures_by_path:
+                futures_by_path[key] = pool.submit(analyze_code, fpath)
+
     analyses = []
     for i, fpath in enumerate(all_files):
         print(f"Анализ файла: {fpath}...")
         try:
-            analysis = analyze_code(fpath)
+            # Копия: у каждого задания своя подпись
+            analysis = dict(futures_by_path[os.path.abspath(fpath)].result())
         except ValueError as e:
             print(f"Ошибка: {e}", file=sys.stderr)
             return 1
@@ -211,6 +243,16 @@ def cmd_generate(args):
     # Основной анализ (первый файл)
     analysis = analyses[0]
 
+    # Блок-схемы и Mermaid-код строятся в фоне, пока выполняются тесты;
+    # одинаковый код обрабатывается один раз
+    sources = list(dict.fromkeys((a["code"], a["language"]) for a in analyses))
+    chart_pool = ThreadPoolExecutor(max_workers=workers)
+    chart_futures = {
+        src: chart_pool.submit(generate_flowchart_and_mermaid, *src)
+        for src in sources
+    }
+    chart_pool.shutdown(wait=False)
+
     # 2. Тестирование
     test_cases = _load_test_data(args)
     test_results = None
@@ -233,8 +275,7 @@ def cmd_generate(args):
     mermaid_codes = []
     for a in analyses:
         print(f"Генерация блок-схемы для {a['filename']}...")
-        fc_path = generate_flowchart(a["code"], a["language"])
-        mermaid = generate_mermaid_code(a["code"], a["language"])
+        fc_path, mermaid = chart_futures[(a["code"], a["language"])].result()
         flowchart_paths.append(fc_path)
         mermaid_codes.append(mermaid)
         if fc_path:
@@ -262,12 +303,11 @@ def cmd_generate(args):
         title_overrides["department"] = args.department
 
     # Подготовка дополнительных заданий
-    extra_tasks = []
-    for i in range(1, len(analyses)):
-        extra_tasks.append({
-            "analysis": analyses[i],
-            "flowchart_path": flowchart_paths[i] if i < len(flowchart_paths) else None,
-        })
+    # flowchart_paths заполняется параллельно analyses, индексы совпадают
+    extra_tasks = [
+        {"analysis": a, "flowchart_path": fc_path}
+        for a, fc_path in zip(analyses[1:], flowchart_paths[1:])
+    ]
 
     output_path = generate_report(
         analysis=analysis,
@@ -300,6 +340,8 @@ def cmd_profiles(args):
     Returns:
         Код возврата (0 — успех).
     """
+    from .profiles import list_profiles, load_profile, save_profile
+
     if args.action == "list":
         profiles = list_profiles()
         print("Доступные профили:")
@@ -4,16 +4,24 @@
 с заданными тестовыми данными.
 """
 
+import functools
 import os
+import re
 import shutil
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 
 # Таймаут выполнения программы (секунды)
 DEFAULT_TIMEOUT = 30
 
+# Разделитель тестов — отдельная строка «---» (пробелы по краям и \r
+# допускаются); «---» внутри строки с данными разделителем не считается
+_TEST_SEPARATOR_RE = re.compile(r"^[ \t]*---\s*$", re.MULTILINE)
 
+
+@functools.lru_cache(maxsize=None)
 def _find_compiler(language):
     """Находит компилятор/интерпретатор для языка.
 
@@ -66,17 +74,20 @@ def _compile_pascal(source_path, compiler):
         return None, f"Компилятор не найден: {compiler}"
 
 
-def _compile_cpp(source_path, compiler):
+def _compile_cpp(source_path, compiler, output_path=None):
     """Компилирует файл C++.
 
     Args:
         source_path: Путь к исходному файлу.
         compiler: Путь к компилятору.
+        output_path: Путь к исполняемому файлу. По умолчанию — рядом
+            с исходным файлом, без расширения.
 
     Returns:
         Кортеж (путь к исполняемому файлу, сообщение об ошибке или None).
     """
-    output_path = os.path.splitext(source_path)[0]
+    if output_path is None:
+        output_path = os.path.splitext(source_path)[0]
     try:
         result = subprocess.run(
             [compiler, source_path, "-o", output_path],
@@ -93,12 +104,14 @@ def _compile_cpp(source_path, compiler):
         return None, f"Компилятор не найден: {compiler}"
 
 
-def compile_code(source_path, language):
+def compile_code(source_path, language, output_path=None):
     """Компилирует исходный код (для Pascal и C++).
 
     Args:
         source_path: Путь к файлу с исходным кодом.
         language: Язык программирования.
+        output_path: Путь к исполняемому файлу (поддерживается для C++).
+            Компиляторы Pascal всегда создают файл рядом с исходным.
 
     Returns:
         Кортеж (путь к исполняемому файлу, сообщение об ошибке или None).
@@ -114,12 +127,13 @@ def compile_code(source_path, language):
     if language == "pascal":
         return _compile_pascal(source_path, compiler)
     elif language == "cpp":
-        return _compile_cpp(source_path, compiler)
+        return _compile_cpp(source_path, compiler, output_path)
 
     return None, f"Неподдерживаемый язык: {language}"
 
 
-def run_program(executable_path, language, input_data="", timeout=None):
+def run_program(executable_path, language, input_data="", timeout=None,
+                interpreter=None, cwd=None):
     """Запускает программу с тестовыми данными.
 
     Args:
@@ -127,6 +141,8 @@ def run_program(executable_path, language, input_data="", timeout=None):
         language: Язык программирования.
         input_data: Входные данные для программы.
         timeout: Таймаут выполнения в секундах.
+        interpreter: Путь к интерпретатору Python (если уже известен).
+        cwd: Рабочая директория программы (по умолчанию — текущая).
 
     Returns:
         Словарь с результатами:
@@ -139,31 +155,21 @@ def run_program(executable_path, language, input_data="", timeout=None):
         timeout = DEFAULT_TIMEOUT
 
     if language == "python":
-        cmd = [_find_compiler("python") or "python3", executable_path]
+        if interpreter is None:
+            interpreter = _find_compiler("python") or "python3"
+        cmd = [interpreter, executable_path]
     else:
         cmd = [executable_path]
 
     try:
-        result = subprocess.run(
+        process = subprocess.Popen(
             cmd,
-            input=input_data,
-            capture_output=True,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=timeout,
+            cwd=cwd,
         )
-        return {
-            "stdout": result.stdout,
-            "stderr": result.stderr,
-            "returncode": result.returncode,
-            "error": None,
-        }
-    except subprocess.TimeoutExpired:
-        return {
-            "stdout": "",
-            "stderr": "",
-            "returncode": -1,
-            "error": f"Превышено время выполнения ({timeout} сек.)",
-        }
     except FileNotFoundError:
         return {
             "stdout": "",
@@ -179,14 +185,119 @@ def run_program(executable_path, language, input_data="", timeout=None):
             "error": f"Нет прав на выполнение: {executable_path}",
         }
 
+    with process:
+        try:
+            stdout, stderr = process.communicate(input_data, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            # Завершаем зависшую программу и закрываем её каналы
+            process.kill()
+            process.communicate()
+            return {
+                "stdout": "",
+                "stderr": "",
+                "returncode": -1,
+                "error": f"Превышено время выполнения ({timeout} сек.)",
+            }
+
+    return {
+        "stdout": stdout,
+        "stderr": stderr,
+        "returncode": process.returncode,
+        "error": None,
+    }
+
 
-def run_tests(source_path, language, test_cases):
+def split_test_cases(text):
+    """Разбивает текст с тестами на отдельные тесты.
+
+    Args:
+        text: Тесты, разделённые строкой «---».
+
+    Returns:
+        Список непустых тестов без пробелов по краям.
+    """
+    return [
+        case
+        for part in _TEST_SEPARATOR_RE.split(text)
+        if (case := part.strip())
+    ]
+
+
+def _run_test_cases(executable, language, test_cases, on_result=None,
+                    isolate=False):
+    """Запускает скомпилированную программу на всех тестовых наборах.
+
+    Args:
+        executable: Путь к исполняемому файлу (или скрипту Python).
+        language: Язык программирования.
+        test_cases: Список строк с входными данными.
+        on_result: Функция, вызываемая с результатом каждого теста
+            сразу по его завершении (см. run_tests).
+        isolate: Запускать ли каждый тест в своей временной рабочей
+            директории (см. run_tests).
+
+    Returns:
+        Словарь с результатами (см. run_tests).
+    """
+    interpreter = None
+    if language == "python":
+        interpreter = _find_compiler("python") or "python3"
+
+    if isolate:
+        # Программы запускаются из своих рабочих директорий, поэтому
+        # относительный путь к ней перестал бы работать
+        executable = os.path.abspath(executable)
+
+    def run_one(numbered_input):
+        i, test_input = numbered_input
+        if isolate:
+            # Отдельная рабочая директория на каждый тест: файлы, которые
+            # программа создаёт по фиксированному имени, не пересекаются
+            # с параллельными запусками
+            with tempfile.TemporaryDirectory() as workdir:
+                result = run_program(
+                    executable, language, test_input,
+                    interpreter=interpreter, cwd=workdir,
+                )
+        else:
+            result = run_program(
+                executable, language, test_input, interpreter=interpreter
+            )
+        result["test_number"] = i + 1
+        result["input"] = test_input
+        if on_result is not None:
+            on_result(result)
+        return result
+
+    # Тесты независимы: каждый запуск — отдельный процесс со своими
+    # каналами ввода-вывода, поэтому выполняем их параллельно
+    workers = max(1, min(os.cpu_count() or 4, len(test_cases)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run_one, enumerate(test_cases)))
+
+    return {
+        "compiled": True,
+        "compile_error": None,
+        "results": results,
+    }
+
+
+def run_tests(source_path, language, test_cases, on_result=None,
+              isolate=False):
     """Запускает программу с несколькими тестовыми наборами данных.
 
     Args:
         source_path: Путь к файлу с исходным кодом.
         language: Язык программирования.
         test_cases: Список строк с входными данными.
+        on_result: Необязательная функция, которая вызывается с результатом
+            каждого теста по мере завершения. Тесты выполняются параллельно,
+            поэтому вызовы идут из рабочих потоков и не по порядку номеров.
+        isolate: Запускать каждый тест в собственной пустой временной
+            рабочей директории. По умолчанию программы работают в текущей
+            директории и видят лежащие в ней файлы данных; с isolate=True
+            файлы, которые программа создаёт по фиксированному имени,
+            не конфликтуют между параллельными тестами.
 
     Returns:
         Словарь с результатами:
@@ -194,16 +305,25 @@ def run_tests(source_path, language, test_cases):
         - compile_error: ошибка компиляции или None
         - results: список результатов запуска для каждого теста
     """
-    # Копируем исходный код во временную директорию для компиляции
-    with tempfile.TemporaryDirectory() as tmpdir:
-        ext = os.path.splitext(source_path)[1]
-        tmp_source = os.path.join(tmpdir, f"program{ext}")
-        with open(source_path, "r", encoding="utf-8") as src:
-            code = src.read()
-        with open(tmp_source, "w", encoding="utf-8") as dst:
-            dst.write(code)
+    # Python не компилируется — запускаем исходный файл напрямую
+    if language == "python":
+        return _run_test_cases(
+            source_path, language, test_cases, on_result, isolate
+        )
 
-        executable, compile_error = compile_code(tmp_source, language)
+    # Результаты компиляции размещаются во временной директории
+    with tempfile.TemporaryDirectory() as tmpdir:
+        if language == "pascal":
+            # Компиляторы Pascal кладут исполняемый и объектные файлы
+            # рядом с исходным, поэтому компилируем его копию
+            ext = os.path.splitext(source_path)[1]
+            tmp_source = os.path.join(tmpdir, f"program{ext}")
+            shutil.copyfile(source_path, tmp_source)
+            executable, compile_error = compile_code(tmp_source, language)
+        else:
+            executable, compile_error = compile_code(
+                source_path, language, os.path.join(tmpdir, "program")
+            )
 
         if compile_error:
             return {
@@ -212,15 +332,6 @@ def run_tests(source_path, language, test_cases):
                 "results": [],
             }
 
-        results = []
-        for i, test_input in enumerate(test_cases):
-            result = run_program(executable, language, test_input)
-            result["test_number"] = i + 1
-            result["input"] = test_input
-            results.append(result)
-
-        return {
-            "compiled": True,
-            "compile_error": None,
-            "results": results,
-        }
+        return _run_test_cases(
+            executable, language, test_cases, on_result, isolate
+        )
@@ -8,14 +8,153 @@
 import os
 import re
 import tempfile
+import threading
 
 try:
     import graphviz
+    from graphviz import quoting
     GRAPHVIZ_AVAILABLE = True
 except ImportError:
     GRAPHVIZ_AVAILABLE = False
 
 
+# Префиксы строк, не попадающих в блок-схему: комментарии,
+# подключение модулей, объявления
+_SKIP_PREFIXES = {
+    "python": ("#", "import ", "from ", "def "),
+    "cpp": ("//", "#include", "using namespace"),
+    "pascal": ("//", "program ", "var", "uses "),
+}
+
+# Строки, целиком состоящие из служебного слова или скобки
+_SKIP_EXACT = {
+    "cpp": frozenset({"{", "}", "};"}),
+    "pascal": frozenset({"program", "begin", "end.", "end;", "var", "uses"}),
+}
+
+# Длина начала строки Pascal, которой достаточно для проверки пропуска:
+# в нижний регистр переводится только оно, а не вся строка
+_PASCAL_PROBE_LEN = max(
+    len(word) for word in _SKIP_PREFIXES["pascal"] + tuple(_SKIP_EXACT["pascal"])
+)
+
+
+# Виды строк и их шаблоны в порядке приоритета. Шаблоны применяются
+# к строке без отступов с начала строки: ввод/вывод и присваивание
+# ищутся в любом месте строки (просмотр вперёд), условия и циклы —
+# по ключевому слову в начале
+_LINE_KIND_PATTERNS = {
+    "pascal": [
+        ("input", r"(?=.*?(?:readln|read\())"),
+        ("output", r"(?=.*?(?:writeln|write\())"),
+        ("condition", r"if "),
+        ("loop", r"(?:for |while |repeat)"),
+        ("assignment", r"(?=.*?:=)"),
+    ],
+    "python": [
+        ("input", r"(?=.*?input\()"),
+        ("output", r"(?=.*?print\()"),
+        ("condition", r"(?:if |elif )"),
+        ("loop", r"(?:for |while )"),
+        ("assignment", r"(?=.*?=)"),
+    ],
+    "cpp": [
+        ("input", r"(?=.*?(?:cin|scanf))"),
+        ("output", r"(?=.*?(?:cout|printf))"),
+        ("condition", r"(?:if |if\()"),
+        ("loop", r"(?:for |for\(|while |while\(|do )"),
+        ("assignment", r"(?=.*?=)"),
+    ],
+}
+
+# Дополнительные условия для одиночных проверок вида строки. В общем
+# выражении они не нужны: строки с if/while/for в начале раньше
+# перехватываются альтернативами условия и цикла
+_STANDALONE_GUARDS = {
+    "python": {"assignment": r"(?!(?-i:if |while |for ))"},
+    "cpp": {"assignment": r"(?!(?-i:if |while |for ))"},
+}
+
+# Регистр ключевых слов не важен; re.ASCII не даёт символам вроде
+# «İ» или «ſ» совпадать с латинскими буквами
+_LINE_FLAGS = re.IGNORECASE | re.ASCII | re.DOTALL
+
+# Одно выражение на язык: вид строки определяется за один вызов match,
+# альтернативы проверяются в порядке приоритета
+_LINE_RES = {
+    language: re.compile(
+        "|".join(f"(?P<{kind}>{pattern})" for kind, pattern in kinds),
+        _LINE_FLAGS,
+    )
+    for language, kinds in _LINE_KIND_PATTERNS.items()
+}
+
+# Отдельные выражения для каждого вида — для одиночных проверок
+_LINE_KIND_RES = {
+    language: {
+        kind: re.compile(
+            _STANDALONE_GUARDS.get(language, {}).get(kind, "") + pattern,
+            _LINE_FLAGS,
+        )
+        for kind, pattern in kinds
+    }
+    for language, kinds in _LINE_KIND_PATTERNS.items()
+}
+
+# Быстрая предварительная проверка всего файла: каждый вид строки
+# требует хотя бы одного из этих фрагментов. Если ни одного нет,
+# блок-схема будет пустой и построчный разбор не нужен
+_CONTENT_HINT_RES = {
+    "pascal": re.compile(
+        r"readln|read\(|writeln|write\(|if |for |while |repeat|:=",
+        _LINE_FLAGS,
+    ),
+    "python": re.compile(
+        r"input\(|print\(|if |for |while |=",
+        _LINE_FLAGS,
+    ),
+    "cpp": re.compile(
+        r"cin|scanf|cout|printf|if |if\(|for |for\(|while |while\(|do |=",
+        _LINE_FLAGS,
+    ),
+}
+
+# Тип узла блок-схемы для каждого вида строки
+_KIND_NODE_TYPES = {
+    "input": "io",
+    "output": "io",
+    "condition": "decision",
+    "loop": "decision",
+    "assignment": "process",
+}
+
+# Выражения для извлечения условий и заголовков циклов
+_CPP_MAIN_RE = re.compile(r"int\s+main\s*\(")
+_CONDITION_LABEL_RES = {
+    "pascal": re.compile(r"(?i)if\s+(.+?)\s+then"),
+    "python": re.compile(r"(?:el)?if\s+(.+?):"),
+    "cpp": re.compile(r"if\s*\((.+?)\)"),
+}
+_PAS_FOR_RE = re.compile(r"(?i)for\s+(.+?)\s+do")
+_PAS_WHILE_RE = re.compile(r"(?i)while\s+(.+?)\s+do")
+_PY_LOOP_RE = re.compile(r"(?:for|while)\s+(.+?):")
+_CPP_LOOP_RE = re.compile(r"(?:for|while)\s*\((.+?)\)")
+
+
+def _has_flowchart_content(code, language):
+    """Проверяет, может ли код дать хотя бы один узел блок-схемы.
+
+    Args:
+        code: Исходный код.
+        language: Язык программирования.
+
+    Returns:
+        False, если в коде заведомо нет ни одного распознаваемого оператора.
+    """
+    hint_re = _CONTENT_HINT_RES.get(language)
+    return hint_re is not None and hint_re.search(code) is not None
+
+
 def _parse_structure(code, language):
     """Разбирает структуру кода для построения блок-схемы.
 
@@ -30,177 +169,130 @@ def _parse_structure(code, language):
     """
     nodes = [{"type": "start", "label": "Начало"}]
 
-    lines = code.strip().split("\n")
+    line_re = _LINE_RES.get(language)
+    if line_re is None:
+        nodes.append({"type": "end", "label": "Конец"})
+        return nodes
 
-    for line in lines:
+    skip_prefixes = _SKIP_PREFIXES.get(language, ())
+    skip_exact = _SKIP_EXACT.get(language, frozenset())
+
+    # Отступы каждой строки убираются ниже, поэтому копия всего
+    # исходного кода через code.strip() не нужна
+    for line in code.split("\n"):
         stripped = line.strip()
         if not stripped:
             continue
 
-        # Пропускаем комментарии
-        if language == "python" and stripped.startswith("#"):
+        # Пропускаем комментарии и декларативные строки
+        # (в Pascal регистр ключевых слов не важен)
+        if language == "pascal":
+            probe = stripped[:_PASCAL_PROBE_LEN].lower()
+            if probe.startswith(skip_prefixes) or (
+                len(stripped) <= _PASCAL_PROBE_LEN and probe in skip_exact
+            ):
+                continue
+        elif stripped.startswith(skip_prefixes) or stripped in skip_exact:
             continue
-        if language in ("cpp", "pascal") and stripped.startswith("//"):
+        if language == "cpp" and _CPP_MAIN_RE.match(stripped):
             continue
 
-        # Пропускаем декларативные строки
-        if language == "pascal" and stripped.lower() in (
-            "program", "begin", "end.", "end;", "var", "uses",
-        ):
-            continue
-        if language == "pascal" and stripped.lower().startswith("program "):
-            continue
-        if language == "pascal" and stripped.lower().startswith("var"):
-            continue
-        if language == "pascal" and stripped.lower().startswith("uses "):
-            continue
-        if language == "cpp" and stripped.startswith("#include"):
-            continue
-        if language == "cpp" and stripped in ("{", "}", "};"):
-            continue
-        if language == "cpp" and stripped.startswith("using namespace"):
-            continue
-        if language == "python" and stripped.startswith("import "):
-            continue
-        if language == "python" and stripped.startswith("from "):
-            continue
-        if language == "python" and stripped.startswith("def "):
-            continue
-        if language == "cpp" and re.match(r"int\s+main\s*\(", stripped):
+        match = line_re.match(stripped)
+        if match is None:
             continue
 
-        # Ввод/вывод
-        if _is_io_statement(stripped, language):
-            label = _extract_io_label(stripped, language)
-            nodes.append({"type": "io", "label": label})
-            continue
+        kind = match.lastgroup
+        if kind == "input":
+            label = "Ввод данных"
+        elif kind == "output":
+            label = "Вывод данных"
+        elif kind == "condition":
+            label = _condition_label(stripped, language)
+        elif kind == "loop":
+            label = _loop_label(stripped, language)
+        else:
+            label = stripped.rstrip(";")
+        nodes.append({"type": _KIND_NODE_TYPES[kind], "label": label})
 
-        # Условия
-        if _is_condition(stripped, language):
-            label = _extract_condition_label(stripped, language)
-            nodes.append({"type": "decision", "label": label})
-            continue
+    nodes.append({"type": "end", "label": "Конец"})
+    return nodes
 
-        # Циклы
-        if _is_loop(stripped, language):
-            label = _extract_loop_label(stripped, language)
-            nodes.append({"type": "decision", "label": label})
-            continue
 
-        # Присваивание и другие операции
-        if _is_assignment(stripped, language):
-            nodes.append({"type": "process", "label": stripped.rstrip(";")})
+def _condition_label(line, language):
+    """Извлекает условие из строки условного оператора."""
+    match = _CONDITION_LABEL_RES[language].search(line)
+    return match.group(1) if match else line.strip()
 
-    nodes.append({"type": "end", "label": "Конец"})
-    return nodes
+
+def _loop_label(line, language):
+    """Извлекает условие из заголовка цикла."""
+    if language == "pascal":
+        # repeat ... until не содержит условия в заголовке
+        head = line[:5].lower()
+        match = None
+        if head.startswith("for"):
+            match = _PAS_FOR_RE.search(line)
+        elif head.startswith("while"):
+            match = _PAS_WHILE_RE.search(line)
+    elif language == "python":
+        match = _PY_LOOP_RE.search(line)
+    else:
+        match = _CPP_LOOP_RE.search(line)
+    if match:
+        return f"Цикл: {match.group(1)}"
+    return f"Цикл: {line.strip()}"
+
+
+def _matches_kind(line, language, kind):
+    """Проверяет, относится ли строка к указанному виду."""
+    kind_res = _LINE_KIND_RES.get(language)
+    return bool(kind_res) and kind_res[kind].match(line.strip()) is not None
 
 
 def _is_io_statement(line, language):
     """Проверяет, является ли строка операцией ввода/вывода."""
-    line_lower = line.lower()
-    if language == "pascal":
-        return any(kw in line_lower for kw in ["readln", "read(", "writeln", "write("])
-    elif language == "python":
-        return any(kw in line_lower for kw in ["input(", "print("])
-    elif language == "cpp":
-        return any(kw in line_lower for kw in ["cin", "cout", "scanf", "printf"])
-    return False
+    return (
+        _matches_kind(line, language, "input")
+        or _matches_kind(line, language, "output")
+    )
 
 
 def _extract_io_label(line, language):
     """Извлекает метку для узла ввода/вывода."""
-    line_lower = line.lower()
-    if language == "pascal":
-        if "readln" in line_lower or "read(" in line_lower:
-            return "Ввод данных"
-        return "Вывод данных"
-    elif language == "python":
-        if "input(" in line_lower:
-            return "Ввод данных"
-        return "Вывод данных"
-    elif language == "cpp":
-        if "cin" in line_lower or "scanf" in line_lower:
-            return "Ввод данных"
-        return "Вывод данных"
-    return line
+    if language not in _LINE_KIND_RES:
+        return line
+    if _matches_kind(line, language, "input"):
+        return "Ввод данных"
+    return "Вывод данных"
 
 
 def _is_condition(line, language):
     """Проверяет, является ли строка условным оператором."""
-    line_lower = line.lower().strip()
-    if language == "pascal":
-        return line_lower.startswith("if ")
-    elif language == "python":
-        return line_lower.startswith("if ") or line_lower.startswith("elif ")
-    elif language == "cpp":
-        return line_lower.startswith("if ") or line_lower.startswith("if(")
-    return False
+    return _matches_kind(line, language, "condition")
 
 
 def _extract_condition_label(line, language):
     """Извлекает условие из строки."""
-    if language == "pascal":
-        match = re.search(r"if\s+(.+?)\s+then", line, re.IGNORECASE)
-        if match:
-            return match.group(1)
-    elif language == "python":
-        match = re.search(r"(?:el)?if\s+(.+?):", line)
-        if match:
-            return match.group(1)
-    elif language == "cpp":
-        match = re.search(r"if\s*\((.+?)\)", line)
-        if match:
-            return match.group(1)
-    return line.strip()
+    if language not in _CONDITION_LABEL_RES:
+        return line.strip()
+    return _condition_label(line, language)
 
 
 def _is_loop(line, language):
     """Проверяет, является ли строка циклом."""
-    line_lower = line.lower().strip()
-    if language == "pascal":
-        return any(line_lower.startswith(kw) for kw in ["for ", "while ", "repeat"])
-    elif language == "python":
-        return any(line_lower.startswith(kw) for kw in ["for ", "while "])
-    elif language == "cpp":
-        return any(
-            line_lower.startswith(kw)
-            for kw in ["for ", "for(", "while ", "while(", "do "]
-        )
-    return False
+    return _matches_kind(line, language, "loop")
 
 
 def _extract_loop_label(line, language):
     """Извлекает условие цикла из строки."""
-    if language == "pascal":
-        if line.lower().startswith("for"):
-            match = re.search(r"for\s+(.+?)\s+do", line, re.IGNORECASE)
-            if match:
-                return f"Цикл: {match.group(1)}"
-        elif line.lower().startswith("while"):
-            match = re.search(r"while\s+(.+?)\s+do", line, re.IGNORECASE)
-            if match:
-                return f"Цикл: {match.group(1)}"
+    if language not in _LINE_KIND_RES:
         return f"Цикл: {line.strip()}"
-    elif language == "python":
-        match = re.search(r"(?:for|while)\s+(.+?):", line)
-        if match:
-            return f"Цикл: {match.group(1)}"
-    elif language == "cpp":
-        match = re.search(r"(?:for|while)\s*\((.+?)\)", line)
-        if match:
-            return f"Цикл: {match.group(1)}"
-    return f"Цикл: {line.strip()}"
+    return _loop_label(line, language)
 
 
 def _is_assignment(line, language):
     """Проверяет, является ли строка присваиванием."""
-    if language == "pascal":
-        return ":=" in line
-    elif language == "python":
-        return "=" in line and not line.strip().startswith(("if ", "while ", "for "))
-    elif language == "cpp":
-        return "=" in line and not line.strip().startswith(("if ", "while ", "for "))
-    return False
+    return _matches_kind(line, language, "assignment")
 
 
 # Формы узлов graphviz
@@ -213,66 +305,142 @@ NODE_SHAPES = {
 }
 
 
-def generate_flowchart(code, language, output_path=None):
-    """Генерирует блок-схему алгоритма.
+# Цвета заливки узлов graphviz
+_NODE_FILLCOLORS = {
+    "start": "#BBDEFB",
+    "end": "#BBDEFB",
+    "process": "#F5F5F5",
+    "decision": "#FFF9C4",
+    "io": "#E8F5E9",
+}
 
-    Args:
-        code: Исходный код.
-        language: Язык программирования.
-        output_path: Путь для сохранения изображения (без расширения).
-            Если None, используется временный файл.
+# Готовые списки атрибутов DOT для каждого типа узла
+if GRAPHVIZ_AVAILABLE:
+    _NODE_ATTR_LISTS = {
+        node_type: quoting.a_list(None, kwargs={
+            "shape": shape,
+            "style": "filled",
+            "fillcolor": _NODE_FILLCOLORS[node_type],
+        })
+        for node_type, shape in NODE_SHAPES.items()
+    }
 
-    Returns:
-        Путь к сгенерированному файлу изображения (PNG) или None при ошибке.
-    """
-    if not GRAPHVIZ_AVAILABLE:
-        return None
 
-    nodes = _parse_structure(code, language)
+def _build_digraph(nodes):
+    """Строит граф graphviz по списку узлов.
 
-    if len(nodes) <= 2:
-        # Только начало и конец - нечего рисовать
-        return None
+    Строки DOT формируются по готовым шаблонам для каждого типа узла
+    и добавляются в тело графа одним вызовом.
+
+    Args:
+        nodes: Список узлов (из _parse_structure).
 
+    Returns:
+        Объект graphviz.Digraph.
+    """
     dot = graphviz.Digraph(format="png")
     dot.attr(rankdir="TB", fontname="Arial", fontsize="12")
     dot.attr("node", fontname="Arial", fontsize="10")
 
-    # Добавляем узлы
-    for i, node in enumerate(nodes):
-        node_id = f"n{i}"
-        shape = NODE_SHAPES.get(node["type"], "box")
-
-        if node["type"] == "io":
-            # Параллелограмм эмулируется через shape и style
-            dot.node(node_id, node["label"], shape="parallelogram",
-                     style="filled", fillcolor="#E8F5E9")
-        elif node["type"] == "decision":
-            dot.node(node_id, node["label"], shape="diamond",
-                     style="filled", fillcolor="#FFF9C4")
-        elif node["type"] in ("start", "end"):
-            dot.node(node_id, node["label"], shape="ellipse",
-                     style="filled", fillcolor="#BBDEFB")
-        else:
-            dot.node(node_id, node["label"], shape="box",
-                     style="filled", fillcolor="#F5F5F5")
+    body = [
+        f"\tn{i} [label={quoting.quote(node['label'])} "
+        f"{_NODE_ATTR_LISTS.get(node['type'], _NODE_ATTR_LISTS['process'])}]\n"
+        for i, node in enumerate(nodes)
+    ]
+    body.extend(f"\tn{i} -> n{i + 1}\n" for i in range(len(nodes) - 1))
+    dot.body.extend(body)
+    return dot
 
-    # Добавляем связи
-    for i in range(len(nodes) - 1):
-        dot.edge(f"n{i}", f"n{i+1}")
+
+# Уже построенные во временных файлах блок-схемы: (код, язык) -> путь.
+# Повторная генерация отчета для неизменного файла не вызывает dot заново
+_RENDER_CACHE_SIZE = 32
+_render_cache = {}
+_render_cache_lock = threading.Lock()
+
+
+def _cached_flowchart(cache_key):
+    """Возвращает ранее построенное изображение, если файл ещё существует."""
+    with _render_cache_lock:
+        cached = _render_cache.get(cache_key)
+    if cached and os.path.exists(cached):
+        return cached
+    return None
+
+
+def _remember_flowchart(cache_key, path):
+    """Запоминает путь к построенному изображению."""
+    with _render_cache_lock:
+        _render_cache.pop(cache_key, None)
+        if len(_render_cache) >= _RENDER_CACHE_SIZE:
+            del _render_cache[next(iter(_render_cache))]
+        _render_cache[cache_key] = path
+
+
+def _render_flowchart(nodes, output_path=None):
+    """Строит изображение блок-схемы по готовому списку узлов.
+
+    Args:
+        nodes: Список узлов из _parse_structure.
+        output_path: Путь для сохранения изображения (без расширения).
+            Если None, используется временный файл.
+
+    Returns:
+        Путь к файлу изображения (PNG) или None при ошибке.
+    """
+    dot = _build_digraph(nodes)
 
     # Сохраняем
     if output_path is None:
         tmpdir = tempfile.mkdtemp()
         output_path = os.path.join(tmpdir, "flowchart")
 
+    # Исходник передаётся dot через stdin (без промежуточного .gv-файла),
+    # изображение записывается сразу в итоговый файл
+    rendered = f"{output_path}.{dot.format}"
     try:
-        rendered = dot.render(output_path, cleanup=True)
-        return rendered
+        image = dot.pipe()
+        os.makedirs(os.path.dirname(os.path.abspath(rendered)), exist_ok=True)
+        with open(rendered, "wb") as f:
+            f.write(image)
     except graphviz.backend.execute.ExecutableNotFound:
         return None
     except Exception:
         return None
+    return rendered
+
+
+def generate_flowchart(code, language, output_path=None):
+    """Генерирует блок-схему алгоритма.
+
+    Args:
+        code: Исходный код.
+        language: Язык программирования.
+        output_path: Путь для сохранения изображения (без расширения).
+            Если None, используется временный файл.
+
+    Returns:
+        Путь к сгенерированному файлу изображения (PNG) или None при ошибке.
+    """
+    if not GRAPHVIZ_AVAILABLE or not _has_flowchart_content(code, language):
+        return None
+
+    cache_key = (code, language) if output_path is None else None
+    if cache_key is not None:
+        cached = _cached_flowchart(cache_key)
+        if cached:
+            return cached
+
+    nodes = _parse_structure(code, language)
+
+    if len(nodes) <= 2:
+        # Только начало и конец - нечего рисовать
+        return None
+
+    rendered = _render_flowchart(nodes, output_path)
+    if rendered and cache_key is not None:
+        _remember_flowchart(cache_key, rendered)
+    return rendered
 
 
 # Формы Mermaid для типов узлов
@@ -295,11 +463,19 @@ def generate_mermaid_code(code, language):
     Returns:
         Строка с Mermaid-кодом блок-схемы или None, если нечего рисовать.
     """
+    if not _has_flowchart_content(code, language):
+        return None
+
     nodes = _parse_structure(code, language)
 
     if len(nodes) <= 2:
         return None
 
+    return _mermaid_from_nodes(nodes)
+
+
+def _mermaid_from_nodes(nodes):
+    """Формирует Mermaid-код по готовому списку узлов."""
     lines = ["flowchart TD"]
 
     for i, node in enumerate(nodes):
@@ -314,6 +490,38 @@ def generate_mermaid_code(code, language):
     return "\n".join(lines)
 
 
+def generate_flowchart_and_mermaid(code, language):
+    """Строит блок-схему и Mermaid-код за один разбор исходного кода.
+
+    Args:
+        code: Исходный код.
+        language: Язык программирования.
+
+    Returns:
+        Кортеж (путь к изображению или None, Mermaid-код или None) —
+        те же значения, что у generate_flowchart и generate_mermaid_code.
+    """
+    if not _has_flowchart_content(code, language):
+        return None, None
+
+    nodes = _parse_structure(code, language)
+
+    if len(nodes) <= 2:
+        return None, None
+
+    mermaid = _mermaid_from_nodes(nodes)
+    if not GRAPHVIZ_AVAILABLE:
+        return None, mermaid
+
+    cache_key = (code, language)
+    fc_path = _cached_flowchart(cache_key)
+    if fc_path is None:
+        fc_path = _render_flowchart(nodes)
+        if fc_path:
+            _remember_flowchart(cache_key, fc_path)
+    return fc_path, mermaid
+
+
 def save_mermaid_code(mermaid_code, output_path):
     """Сохраняет Mermaid-код в файл.
 
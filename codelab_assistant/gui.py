@@ -4,21 +4,43 @@
 """
 
 import os
+import queue
 import sys
 import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import filedialog, messagebox, scrolledtext, ttk
 
 from .analyzer import analyze_code
-from .executor import run_tests
-from .flowchart import generate_flowchart, generate_mermaid_code, save_mermaid_code
+from .executor import run_tests, split_test_cases
+from .flowchart import generate_flowchart_and_mermaid, save_mermaid_code
 from .profiles import list_profiles
 from .report_generator import generate_report
 
+# Максимальное число потоков для анализа и построения блок-схем
+MAX_WORKERS = 8
+
+# Период (мс), с которым сообщения рабочего потока переносятся в журнал
+LOG_FLUSH_MS = 50
+
+# Журнал хранит не больше LOG_MAX_LINES строк; при превышении
+# обрезается до LOG_KEEP_LINES последних
+LOG_MAX_LINES = 2000
+LOG_KEEP_LINES = 1500
+
 
 class CodelabGUI:
     """Главное окно приложения."""
 
+    # Типы файлов для диалога выбора исходного кода
+    _FILETYPES = (
+        ("Исходный код", "*.pas *.py *.cpp *.cc *.cxx *.c"),
+        ("Pascal", "*.pas"),
+        ("Python", "*.py"),
+        ("C++", "*.cpp *.cc *.cxx *.c"),
+        ("Все файлы", "*.*"),
+    )
+
     def __init__(self, root):
         """Инициализация GUI.
 
@@ -32,6 +54,11 @@ class CodelabGUI:
 
         self._create_widgets()
 
+        # Сообщения из рабочего потока копятся в очереди и выводятся
+        # в журнал пачкой, а не отдельным событием Tk на каждую строку
+        self._log_queue = queue.SimpleQueue()
+        self.root.after(LOG_FLUSH_MS, self._drain_log)
+
     def _create_widgets(self):
         """Создает виджеты интерфейса."""
         main_frame = ttk.Frame(self.root, padding=10)
@@ -45,7 +72,13 @@ class CodelabGUI:
 
         # Список файлов
         self.files_list = []  # list of (path, label)
-        self.files_listbox = tk.Listbox(file_frame, height=4)
+        # Отображаемые строки списка: изменения применяются одной
+        # установкой переменной, а не парами delete/insert
+        self.files_display = []
+        self.files_display_var = tk.Variable(value=())
+        self.files_listbox = tk.Listbox(
+            file_frame, height=4, listvariable=self.files_display_var
+        )
         self.files_listbox.pack(fill=tk.X, pady=(0, 5))
 
         btn_row = ttk.Frame(file_frame)
@@ -130,10 +163,12 @@ class CodelabGUI:
 
         ttk.Label(profile_frame, text="Профиль:").pack(side=tk.LEFT)
         self.profile_var = tk.StringVar(value="default")
-        profiles = list_profiles()
+        # Список профилей читается при открытии списка, а не при запуске;
+        # так в нём видны и профили, созданные после старта окна
         self.profile_combo = ttk.Combobox(
             profile_frame, textvariable=self.profile_var,
-            values=profiles, state="readonly", width=20
+            values=["default"], state="readonly", width=20,
+            postcommand=self._refresh_profiles,
         )
         self.profile_combo.pack(side=tk.LEFT, padx=5)
 
@@ -169,28 +204,27 @@ class CodelabGUI:
         self.log_text = scrolledtext.ScrolledText(log_frame, height=8, state=tk.DISABLED)
         self.log_text.pack(fill=tk.BOTH, expand=True)
 
+    def _refresh_profiles(self):
+        """Обновляет список профилей в выпадающем списке."""
+        self.profile_combo.configure(values=list_profiles())
+
     def _add_file(self):
         """Открывает диалог выбора файла и добавляет в список."""
-        filetypes = [
-            ("Исходный код", "*.pas *.py *.cpp *.cc *.cxx *.c"),
-            ("Pascal", "*.pas"),
-            ("Python", "*.py"),
-            ("C++", "*.cpp *.cc *.cxx *.c"),
-            ("Все файлы", "*.*"),
-        ]
-        filepaths = filedialog.askopenfilenames(filetypes=filetypes)
+        filepaths = filedialog.askopenfilenames(filetypes=self._FILETYPES)
         for filepath in filepaths:
             if filepath:
                 self.files_list.append({"path": filepath, "label": ""})
-                self.files_listbox.insert(tk.END, os.path.basename(filepath))
+                self.files_display.append(os.path.basename(filepath))
+        self.files_display_var.set(tuple(self.files_display))
 
     def _remove_file(self):
         """Удаляет выбранный файл из списка."""
         selection = self.files_listbox.curselection()
         if selection:
             idx = selection[0]
-            self.files_listbox.delete(idx)
             self.files_list.pop(idx)
+            self.files_display.pop(idx)
+            self.files_display_var.set(tuple(self.files_display))
 
     def _update_file_label(self):
         """Обновляет подпись выбранного файла."""
@@ -204,8 +238,9 @@ class CodelabGUI:
         display = os.path.basename(self.files_list[idx]["path"])
         if label:
             display += f" [{label}]"
-        self.files_listbox.delete(idx)
-        self.files_listbox.insert(idx, display)
+        # Выделение сохраняется: строка меняется на месте
+        self.files_display[idx] = display
+        self.files_display_var.set(tuple(self.files_display))
 
     def _log(self, message):
         """Добавляет сообщение в журнал.
@@ -213,11 +248,52 @@ class CodelabGUI:
         Args:
             message: Текст сообщения.
         """
+        self._log_many([message])
+
+    def _log_many(self, messages):
+        """Добавляет в журнал несколько сообщений за одну вставку.
+
+        Args:
+            messages: Список строк.
+        """
+        if not messages:
+            return
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, "\n".join(messages) + "\n")
+        lines = int(self.log_text.index("end-1c").split(".")[0])
+        if lines > LOG_MAX_LINES:
+            self.log_text.delete("1.0", f"{lines - LOG_KEEP_LINES}.0")
         self.log_text.see(tk.END)
         self.log_text.config(state=tk.DISABLED)
 
+    def _log_async(self, message):
+        """Ставит сообщение в очередь журнала (из любого потока).
+
+        Args:
+            message: Текст сообщения.
+        """
+        self._log_queue.put(message)
+
+    def _drain_log(self):
+        """Выводит накопленные сообщения и планирует следующую проверку."""
+        messages = []
+        while True:
+            try:
+                messages.append(self._log_queue.get_nowait())
+            except queue.Empty:
+                break
+        self._log_many(messages)
+        self.root.after(LOG_FLUSH_MS, self._drain_log)
+
+    def _log_test_result(self, result):
+        """Ставит в очередь журнала строку о завершённом тесте.
+
+        Args:
+            result: Результат теста из run_tests.
+        """
+        status = "✓" if result["returncode"] == 0 else "✗"
+        self._log_async(f"  Тест {result['test_number']}: {status}")
+
     def _generate_report(self):
         """Запускает генерацию отчета в отдельном потоке."""
         if not self.files_list:
@@ -242,57 +318,68 @@ class CodelabGUI:
         try:
             source_file = self.files_list[0]["path"]
 
-            # 1. Анализ всех файлов
+            # 1. Анализ всех файлов (параллельно — файлы независимы);
+            # повторно добавленный файл анализируется один раз
+            workers = min(MAX_WORKERS, len(self.files_list))
+            futures_by_path = {}
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                for entry in self.files_list:
+                    key = os.path.abspath(entry["path"])
+                    if key not in futures_by_path:
+                        futures_by_path[key] = pool.submit(
+                            analyze_code, entry["path"]
+                        )
+
             analyses = []
             for entry in self.files_list:
                 fpath = entry["path"]
-                self.root.after(0, self._log, f"Анализ файла: {fpath}")
-                analysis = analyze_code(fpath)
+                self._log_async(f"Анализ файла: {fpath}")
+                # Копия: у каждого задания своя подпись
+                analysis = dict(futures_by_path[os.path.abspath(fpath)].result())
                 analysis["task_label"] = entry.get("label", "")
-                self.root.after(
-                    0, self._log,
-                    f"  Язык: {analysis['language_display']}"
-                )
+                self._log_async(f"  Язык: {analysis['language_display']}")
                 analyses.append(analysis)
 
             analysis = analyses[0]
 
+            # Блок-схемы и Mermaid-код строятся в фоне, пока выполняются
+            # тесты; одинаковый код обрабатывается один раз
+            sources = list(
+                dict.fromkeys((a["code"], a["language"]) for a in analyses)
+            )
+            chart_pool = ThreadPoolExecutor(max_workers=workers)
+            chart_futures = {
+                src: chart_pool.submit(generate_flowchart_and_mermaid, *src)
+                for src in sources
+            }
+            chart_pool.shutdown(wait=False)
+
             # 2. Тесты (для основного файла)
             test_data_raw = self.test_data_text.get("1.0", tk.END).strip()
             test_results = None
 
             if test_data_raw:
-                test_cases = [
-                    t.strip() for t in test_data_raw.split("---") if t.strip()
-                ]
-                self.root.after(0, self._log,
-                                f"Запуск {len(test_cases)} тестов...")
+                test_cases = split_test_cases(test_data_raw)
+                self._log_async(f"Запуск {len(test_cases)} тестов...")
+                # Результаты выводятся в журнал по мере завершения тестов
                 test_results = run_tests(
-                    source_file, analysis["language"], test_cases
+                    source_file, analysis["language"], test_cases,
+                    on_result=self._log_test_result,
                 )
-                if test_results["compiled"]:
-                    for r in test_results["results"]:
-                        status = "✓" if r["returncode"] == 0 else "✗"
-                        self.root.after(
-                            0, self._log,
-                            f"  Тест {r['test_number']}: {status}"
-                        )
 
             # 3. Блок-схемы для всех файлов
             flowchart_paths = []
             mermaid_codes = []
             for a in analyses:
-                self.root.after(
-                    0, self._log,
-                    f"Генерация блок-схемы для {a['filename']}..."
-                )
-                fc_path = generate_flowchart(a["code"], a["language"])
-                mermaid = generate_mermaid_code(a["code"], a["language"])
+                self._log_async(f"Генерация блок-схемы для {a['filename']}...")
+                fc_path, mermaid = chart_futures[
+                    (a["code"], a["language"])
+                ].result()
                 flowchart_paths.append(fc_path)
                 mermaid_codes.append(mermaid)
 
             # 4. Отчет
-            self.root.after(0, self._log, "Создание отчета...")
+            self._log_async("Создание отчета...")
             student_info = {
                 "name": self.name_var.get(),
                 "group": self.group_var.get(),
@@ -300,26 +387,23 @@ class CodelabGUI:
             }
 
             # Переопределение полей титульной страницы
-            title_overrides = {}
-            uni = self.university_var.get().strip()
-            fac = self.faculty_var.get().strip()
-            dep = self.department_var.get().strip()
-            if uni:
-                title_overrides["university"] = uni
-            if fac:
-                title_overrides["faculty"] = fac
-            if dep:
-                title_overrides["department"] = dep
+            title_fields = (
+                ("university", self.university_var),
+                ("faculty", self.faculty_var),
+                ("department", self.department_var),
+            )
+            title_overrides = {
+                field: value
+                for field, var in title_fields
+                if (value := var.get().strip())
+            }
 
             # Дополнительные задания
-            extra_tasks = []
-            for i in range(1, len(analyses)):
-                extra_tasks.append({
-                    "analysis": analyses[i],
-                    "flowchart_path": (
-                        flowchart_paths[i] if i < len(flowchart_paths) else None
-                    ),
-                })
+            # flowchart_paths заполняется параллельно analyses
+            extra_tasks = [
+                {"analysis": a, "flowchart_path": fc_path}
+                for a, fc_path in zip(analyses[1:], flowchart_paths[1:])
+            ]
 
             output_path = generate_report(
                 analysis=analysis,
@@ -338,11 +422,9 @@ class CodelabGUI:
                     suffix = "" if i == 0 else f"_task{i+1}"
                     mmd_path = f"{base}{suffix}_flowchart.mmd"
                     save_mermaid_code(mermaid, mmd_path)
-                    self.root.after(
-                        0, self._log, f"  Mermaid-код: {mmd_path}"
-                    )
+                    self._log_async(f"  Mermaid-код: {mmd_path}")
 
-            self.root.after(0, self._log, f"Отчет сохранен: {output_path}")
+            self._log_async(f"Отчет сохранен: {output_path}")
             self.root.after(0, self.status_var.set, "Готово!")
             self.root.after(
                 0, messagebox.showinfo,
@@ -350,7 +432,7 @@ class CodelabGUI:
             )
 
         except Exception as e:
-            self.root.after(0, self._log, f"Ошибка: {e}")
+            self._log_async(f"Ошибка: {e}")
             self.root.after(0, self.status_var.set, "Ошибка!")
             self.root.after(
                 0, messagebox.showerror, "Ошибка", str(e)
@@ -4,6 +4,7 @@
 для конкретных преподавателей.
 """
 
+import copy
 import json
 import os
 
@@ -42,9 +43,22 @@ DEFAULT_PROFILE = {
     },
     "line_spacing": 1.5,
     "page_numbers": True,
+    # Подсветка синтаксиса в листинге; False — код одним фрагментом
+    # без разбора лексером
+    "highlight_code": True,
 }
 
 
+# Кэш списка профилей: ключ — (директория, время её изменения),
+# значение — кортеж имён. Добавление или удаление файла меняет
+# время изменения директории, и список перечитывается
+_list_cache = {"key": None, "profiles": ()}
+
+# Кэш загруженных профилей: путь к файлу -> ((время изменения, размер
+# файла), объединённый профиль). Наружу отдаются только копии
+_profile_cache = {}
+
+
 def get_profiles_dir():
     """Возвращает абсолютный путь к директории профилей.
 
@@ -63,17 +77,83 @@ def list_profiles():
         Список имён профилей (без расширения).
     """
     profiles_dir = get_profiles_dir()
-    profiles = ["default"]
+    key = (profiles_dir, os.stat(profiles_dir).st_mtime_ns)
+    if _list_cache["key"] == key:
+        return list(_list_cache["profiles"])
 
-    for f in os.listdir(profiles_dir):
-        if f.endswith(".json"):
-            name = os.path.splitext(f)[0]
-            if name not in profiles:
-                profiles.append(name)
+    profiles = ["default"]
 
+    with os.scandir(profiles_dir) as entries:
+        for entry in entries:
+            # default всегда первый; имена файлов в директории уникальны,
+            # поэтому других повторов быть не может
+            if (
+                entry.name.endswith(".json")
+                and entry.name != "default.json"
+                and entry.is_file()
+            ):
+                profiles.append(entry.name[:-5])
+
+    _list_cache["key"] = key
+    _list_cache["profiles"] = tuple(profiles)
     return profiles
 
 
+def _merge_profile(base, override):
+    """Дополняет base значениями из override с учётом вложенных словарей.
+
+    Вложенные словари (margins, title_page) объединяются по ключам,
+    остальные значения, включая списки, заменяются целиком.
+
+    Args:
+        base: Изменяемый словарь (результат объединения).
+        override: Словарь с переопределениями.
+    """
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(base.get(key), dict):
+            _merge_profile(base[key], value)
+        else:
+            base[key] = value
+
+
+def _matches_default_type(value, default):
+    """Проверяет, что значение имеет тот же тип, что и в профиле по умолчанию.
+
+    Целые и дробные числа взаимозаменяемы, bool числом не считается.
+    У списков проверяется тип элементов по первому элементу значения
+    по умолчанию.
+    """
+    if isinstance(default, bool):
+        return isinstance(value, bool)
+    if isinstance(default, (int, float)):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if isinstance(default, list):
+        return isinstance(value, list) and (
+            not default
+            or all(_matches_default_type(item, default[0]) for item in value)
+        )
+    return isinstance(value, type(default))
+
+
+def _validate_profile(profile, default):
+    """Проверяет профиль один раз при загрузке.
+
+    Поля с неподходящим типом (например, строка вместо размера шрифта)
+    заменяются значениями по умолчанию, чтобы генератор отчетов
+    получал корректные данные. Дополнительные поля не трогаются.
+
+    Args:
+        profile: Изменяемый объединённый профиль.
+        default: Соответствующая часть профиля по умолчанию.
+    """
+    for key, default_value in default.items():
+        value = profile.get(key)
+        if isinstance(default_value, dict) and isinstance(value, dict):
+            _validate_profile(value, default_value)
+        elif not _matches_default_type(value, default_value):
+            profile[key] = copy.deepcopy(default_value)
+
+
 def load_profile(name="default"):
     """Загружает профиль преподавателя.
 
@@ -83,21 +163,33 @@ def load_profile(name="default"):
     Returns:
         Словарь с настройками профиля.
     """
+    # Глубокая копия: изменение вложенных словарей и списков
+    # в результате не затрагивает DEFAULT_PROFILE
+    merged = copy.deepcopy(DEFAULT_PROFILE)
     if name == "default":
-        return DEFAULT_PROFILE.copy()
+        return merged
 
     profiles_dir = get_profiles_dir()
     filepath = os.path.join(profiles_dir, f"{name}.json")
 
-    if not os.path.exists(filepath):
-        return DEFAULT_PROFILE.copy()
+    try:
+        stat = os.stat(filepath)
+    except FileNotFoundError:
+        return merged
+
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _profile_cache.get(filepath)
+    if cached is not None and cached[0] == key:
+        return copy.deepcopy(cached[1])
 
     with open(filepath, "r", encoding="utf-8") as f:
         profile = json.load(f)
 
     # Дополняем недостающие поля из профиля по умолчанию
-    merged = DEFAULT_PROFILE.copy()
-    merged.update(profile)
+    if isinstance(profile, dict):
+        _merge_profile(merged, profile)
+        _validate_profile(merged, DEFAULT_PROFILE)
+    _profile_cache[filepath] = (key, copy.deepcopy(merged))
     return merged
 
 
@@ -114,6 +206,11 @@ def save_profile(name, profile_data):
     with open(filepath, "w", encoding="utf-8") as f:
         json.dump(profile_data, f, ensure_ascii=False, indent=2)
 
+    # На файловых системах с грубым разрешением времени mtime
+    # может не измениться, поэтому сбрасываем кэш явно
+    _list_cache["key"] = None
+    _profile_cache.pop(filepath, None)
+
 
 def delete_profile(name):
     """Удаляет профиль преподавателя.
@@ -132,5 +229,7 @@ def delete_profile(name):
 
     if os.path.exists(filepath):
         os.remove(filepath)
+        _list_cache["key"] = None
+        _profile_cache.pop(filepath, None)
         return True
     return False
@@ -4,34 +4,207 @@
 листингом кода, результатами тестирования и выводами.
 """
 
+import copy
+import functools
+import itertools
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
 from docx.shared import Cm, Pt, RGBColor
-from pygments import highlight
-from pygments.formatters import NullFormatter
-from pygments.lexers import CppLexer, DelphiLexer, PythonLexer
+from docx.text.run import Run
+from pygments.token import (
+    Comment,
+    Keyword,
+    Literal,
+    Name,
+    Number,
+    Operator,
+    String,
+)
 
 from .profiles import load_profile
 
 
+# Имена классов лексеров Pygments по языкам
+_LEXER_NAMES = {
+    "pascal": "DelphiLexer",
+    "python": "PythonLexer",
+    "cpp": "CppLexer",
+}
+
+
+@functools.lru_cache(maxsize=None)
 def _get_lexer(language):
     """Возвращает лексер Pygments для языка.
 
+    Лексер создаётся один раз на язык: get_tokens не меняет его
+    состояние, поэтому экземпляр можно переиспользовать.
+    Модуль лексеров импортируется только здесь: он тяжёлый и не нужен,
+    если подсветка кода отключена.
+
     Args:
         language: Язык программирования.
 
     Returns:
         Экземпляр лексера Pygments.
     """
-    lexers = {
-        "pascal": DelphiLexer(),
-        "python": PythonLexer(),
-        "cpp": CppLexer(),
-    }
-    return lexers.get(language, PythonLexer())
+    from pygments import lexers
+
+    return getattr(lexers, _LEXER_NAMES.get(language, "PythonLexer"))()
+
+
+@functools.lru_cache(maxsize=32)
+def _tokenize(language, code):
+    """Разбивает код на токены Pygments с кэшированием.
+
+    Повторная генерация отчета для того же кода (или одинаковые
+    листинги в одном отчете) не запускает лексер заново.
+
+    Args:
+        language: Язык программирования.
+        code: Исходный код.
+
+    Returns:
+        Кортеж пар (тип токена, текст).
+    """
+    return tuple(_get_lexer(language).get_tokens(code))
+
+
+# Цвета для разных типов токенов. Порядок важен: берётся первый
+# подходящий родительский тип (поэтому числа, как подтип Literal,
+# окрашиваются цветом литералов)
+_TOKEN_COLORS = {
+    Keyword: RGBColor(0, 0, 255),       # Синий
+    Comment: RGBColor(0, 128, 0),        # Зелёный
+    String: RGBColor(163, 21, 21),       # Тёмно-красный
+    Literal: RGBColor(163, 21, 21),      # Тёмно-красный
+    Number: RGBColor(9, 134, 88),        # Тёмно-зелёный
+    Name.Function: RGBColor(128, 0, 0),  # Тёмно-красный
+    Operator: RGBColor(0, 0, 0),         # Чёрный
+}
+
+_DEFAULT_TOKEN_COLOR = RGBColor(0, 0, 0)  # По умолчанию чёрный
+
+
+@functools.lru_cache(maxsize=None)
+def _token_style(token_type):
+    """Возвращает оформление токена: (цвет, жирный ли шрифт).
+
+    Различных типов токенов в листинге немного, поэтому обход
+    родительских типов выполняется один раз на тип.
+
+    Args:
+        token_type: Тип токена Pygments.
+
+    Returns:
+        Кортеж (RGBColor, bool).
+    """
+    color = _DEFAULT_TOKEN_COLOR
+    for parent_type, parent_color in _TOKEN_COLORS.items():
+        if token_type in parent_type:
+            color = parent_color
+            break
+
+    # Ключевые слова — жирным
+    return color, token_type in Keyword
+
+
+def _listing_run_properties(font_name, font_size, color, bold):
+    """Строит элемент w:rPr для фрагмента листинга.
+
+    Args:
+        font_name: Шрифт кода.
+        font_size: Размер шрифта кода (пт).
+        color: Цвет текста (RGBColor).
+        bold: Выделять ли жирным.
+
+    Returns:
+        Элемент w:rPr, который копируется в каждый фрагмент.
+    """
+    run = Run(OxmlElement("w:r"), None)
+    run.font.name = font_name
+    run.font.size = Pt(font_size)
+    run.font.color.rgb = color
+    if bold:
+        run.bold = True
+    return run._r.rPr
+
+
+def _add_blank_paragraphs(doc, count):
+    """Добавляет пустые абзацы-отступы.
+
+    Пустые элементы w:p вставляются в тело документа напрямую,
+    без создания объектов Paragraph.
+
+    Args:
+        doc: Документ docx.
+        count: Количество абзацев.
+    """
+    body = doc.element.body
+    for _ in range(count):
+        body.add_p()
+
+
+def _set_heading_font(doc, font_name):
+    """Задаёт шрифт стиля заголовков разделов.
+
+    Шрифт задаётся один раз в стиле, а не в каждом фрагменте заголовка.
+    Ссылки на шрифты темы из стиля убираются: в Word они имеют
+    приоритет над явно указанным именем шрифта.
+
+    Args:
+        doc: Документ docx.
+        font_name: Название шрифта.
+    """
+    style = doc.styles["Heading 1"]
+    style.font.name = font_name
+    r_fonts = style.element.rPr.rFonts
+    for attr in ("w:asciiTheme", "w:hAnsiTheme"):
+        r_fonts.attrib.pop(qn(attr), None)
+
+
+def _text_run_properties(font_name, font_size, bold=False):
+    """Строит элемент w:rPr для фрагмента обычного текста.
+
+    Args:
+        font_name: Название шрифта.
+        font_size: Размер шрифта (пт).
+        bold: Выделять ли жирным.
+
+    Returns:
+        Элемент w:rPr, который копируется в каждый фрагмент.
+    """
+    run = Run(OxmlElement("w:r"), None)
+    run.font.name = font_name
+    run.font.size = Pt(font_size)
+    if bold:
+        run.bold = True
+    return run._r.rPr
+
+
+def _add_text_paragraph(doc, text, alignment, rpr):
+    """Добавляет абзац из одного фрагмента текста.
+
+    Абзац собирается из элементов XML напрямую: оформление фрагмента
+    копируется из готового w:rPr, без обёрток Paragraph и Run.
+
+    Args:
+        doc: Документ docx.
+        text: Текст абзаца.
+        alignment: Выравнивание (WD_ALIGN_PARAGRAPH).
+        rpr: Шаблон w:rPr для фрагмента.
+    """
+    p = doc.element.body.add_p()
+    p.get_or_add_pPr().jc_val = alignment
+    r = OxmlElement("w:r")
+    r.append(copy.deepcopy(rpr))
+    r.text = text
+    p.append(r)
 
 
 def _add_title_page(doc, profile, student_info, analysis, title_overrides=None):
@@ -53,77 +226,55 @@ def _add_title_page(doc, profile, student_info, analysis, title_overrides=None):
         title_config = dict(title_config)
         title_config.update(title_overrides)
 
+    # Оформление строк титульного листа строится один раз
+    text_rpr = _text_run_properties(font_name, font_size)
+    center = WD_ALIGN_PARAGRAPH.CENTER
+    right = WD_ALIGN_PARAGRAPH.RIGHT
+
     # Верхняя часть — информация об учебном заведении
     for field in ["university", "faculty", "department"]:
         value = title_config.get(field, "")
         if value:
-            p = doc.add_paragraph()
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            run = p.add_run(value)
-            run.font.name = font_name
-            run.font.size = Pt(font_size)
+            _add_text_paragraph(doc, value, center, text_rpr)
 
     # Отступ
-    for _ in range(4):
-        doc.add_paragraph()
+    _add_blank_paragraphs(doc, 4)
 
     # Тип работы
     work_type = title_config.get("work_type", "Лабораторная работа")
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = p.add_run(work_type)
-    run.font.name = font_name
-    run.font.size = Pt(font_size + 4)
-    run.bold = True
+    _add_text_paragraph(
+        doc, work_type, center,
+        _text_run_properties(font_name, font_size + 4, bold=True),
+    )
 
     # Дисциплина
     discipline = title_config.get("discipline", "Программирование")
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = p.add_run(f'по дисциплине "{discipline}"')
-    run.font.name = font_name
-    run.font.size = Pt(font_size)
+    _add_text_paragraph(
+        doc, f'по дисциплине "{discipline}"', center, text_rpr
+    )
 
     # Тема/Вариант
     variant = student_info.get("variant", "")
     if variant:
-        p = doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p.add_run(f"Вариант {variant}")
-        run.font.name = font_name
-        run.font.size = Pt(font_size)
+        _add_text_paragraph(doc, f"Вариант {variant}", center, text_rpr)
 
     # Отступ
-    for _ in range(4):
-        doc.add_paragraph()
+    _add_blank_paragraphs(doc, 4)
 
     # Информация о студенте — правая сторона
     student_name = student_info.get("name", "Студент")
     group = student_info.get("group", "")
 
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-    run = p.add_run(f"Выполнил: {student_name}")
-    run.font.name = font_name
-    run.font.size = Pt(font_size)
+    _add_text_paragraph(doc, f"Выполнил: {student_name}", right, text_rpr)
 
     if group:
-        p = doc.add_paragraph()
-        p.alignment = WD_ALIGN_PARAGRAPH.RIGHT
-        run = p.add_run(f"Группа: {group}")
-        run.font.name = font_name
-        run.font.size = Pt(font_size)
+        _add_text_paragraph(doc, f"Группа: {group}", right, text_rpr)
 
     # Отступ
-    for _ in range(3):
-        doc.add_paragraph()
+    _add_blank_paragraphs(doc, 3)
 
     # Год
-    p = doc.add_paragraph()
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    run = p.add_run(str(datetime.now().year))
-    run.font.name = font_name
-    run.font.size = Pt(font_size)
+    _add_text_paragraph(doc, str(datetime.now().year), center, text_rpr)
 
     # Разрыв страницы
     doc.add_page_break()
@@ -140,9 +291,7 @@ def _add_purpose_section(doc, profile, analysis):
     font_name = profile.get("font_name", "Times New Roman")
     font_size = profile.get("font_size", 14)
 
-    heading = doc.add_heading("Цель работы", level=1)
-    for run in heading.runs:
-        run.font.name = font_name
+    doc.add_heading("Цель работы", level=1)
 
     p = doc.add_paragraph()
     run = p.add_run(analysis["purpose"])
@@ -183,12 +332,20 @@ def _add_flowchart_section(doc, profile, flowchart_path, label="", figure_num=1)
     heading_text = "Блок-схема алгоритма"
     if label:
         heading_text += f" — {label}"
-    heading = doc.add_heading(heading_text, level=1)
-    for run in heading.runs:
-        run.font.name = font_name
-
-    if flowchart_path and os.path.exists(flowchart_path):
-        doc.add_picture(flowchart_path, width=Cm(15))
+    doc.add_heading(heading_text, level=1)
+
+    # Файл открывается сразу, без отдельной проверки os.path.exists.
+    # Картинка готовится до добавления абзаца, чтобы при ошибке
+    # в документе не остался пустой абзац
+    inline = None
+    if flowchart_path:
+        try:
+            inline = doc.part.new_pic_inline(flowchart_path, Cm(15), None)
+        except OSError:
+            pass
+
+    if inline is not None:
+        doc.add_paragraph().add_run()._r.add_drawing(inline)
         p = doc.add_paragraph()
         p.alignment = WD_ALIGN_PARAGRAPH.CENTER
         run = p.add_run(f"Рис. {figure_num}. Блок-схема алгоритма")
@@ -222,9 +379,7 @@ def _add_listing_section(doc, profile, analysis, label=""):
     heading_text = "Листинг программы"
     if label:
         heading_text += f" — {label}"
-    heading = doc.add_heading(heading_text, level=1)
-    for run in heading.runs:
-        run.font.name = font_name
+    doc.add_heading(heading_text, level=1)
 
     p = doc.add_paragraph()
     run = p.add_run(f"Файл: {analysis['filename']}")
@@ -233,51 +388,36 @@ def _add_listing_section(doc, profile, analysis, label=""):
     run.italic = True
 
     # Добавляем код с подсветкой синтаксиса (упрощённый вариант)
-    lexer = _get_lexer(analysis["language"])
-    tokens = lexer.get_tokens(analysis["code"])
-
-    # Определяем цвета для разных типов токенов
-    from pygments.token import (
-        Comment,
-        Keyword,
-        Literal,
-        Name,
-        Number,
-        Operator,
-        String,
-    )
-
-    token_colors = {
-        Keyword: RGBColor(0, 0, 255),       # Синий
-        Comment: RGBColor(0, 128, 0),        # Зелёный
-        String: RGBColor(163, 21, 21),       # Тёмно-красный
-        Literal: RGBColor(163, 21, 21),      # Тёмно-красный
-        Number: RGBColor(9, 134, 88),        # Тёмно-зелёный
-        Name.Function: RGBColor(128, 0, 0),  # Тёмно-красный
-        Operator: RGBColor(0, 0, 0),         # Чёрный
-    }
-
     p = doc.add_paragraph()
     p.paragraph_format.space_before = Pt(6)
     p.paragraph_format.space_after = Pt(6)
 
-    for token_type, token_value in tokens:
-        run = p.add_run(token_value)
+    # Без подсветки код выводится одним фрагментом, лексер не нужен
+    if not profile.get("highlight_code", True):
+        run = p.add_run(analysis["code"])
         run.font.name = code_font
         run.font.size = Pt(code_size)
+        return
 
-        # Подбираем цвет
-        color = RGBColor(0, 0, 0)  # По умолчанию чёрный
-        for parent_type, parent_color in token_colors.items():
-            if token_type is parent_type or token_type in parent_type:
-                color = parent_color
-                break
-
-        run.font.color.rgb = color
-
-        # Ключевые слова — жирным
-        if token_type is Keyword or token_type in Keyword:
-            run.bold = True
+    tokens = _tokenize(analysis["language"], analysis["code"])
+
+    # Соседние токены с одинаковым оформлением (например, имя и пробел
+    # после него) выводятся одним фрагментом текста. Фрагменты собираются
+    # прямо в XML абзаца: свойства шрифта для каждого оформления
+    # строятся один раз и копируются
+    run_properties = {}
+    for style, group in itertools.groupby(
+        tokens, key=lambda token: _token_style(token[0])
+    ):
+        rpr = run_properties.get(style)
+        if rpr is None:
+            rpr = run_properties[style] = _listing_run_properties(
+                code_font, code_size, *style
+            )
+        r = OxmlElement("w:r")
+        r.append(copy.deepcopy(rpr))
+        r.text = "".join(token_value for _, token_value in group)
+        p._p.append(r)
 
 
 def _add_test_results_section(doc, profile, test_results):
@@ -291,9 +431,7 @@ def _add_test_results_section(doc, profile, test_results):
     font_name = profile.get("font_name", "Times New Roman")
     font_size = profile.get("font_size", 14)
 
-    heading = doc.add_heading("Результаты тестирования", level=1)
-    for run in heading.runs:
-        run.font.name = font_name
+    doc.add_heading("Результаты тестирования", level=1)
 
     if not test_results or not test_results.get("compiled"):
         error_msg = "Программа не была выполнена."
@@ -331,26 +469,37 @@ def _add_test_results_section(doc, profile, test_results):
                 run.font.name = font_name
                 run.font.size = Pt(font_size - 2)
 
-    # Данные
-    for result in results:
-        row = table.add_row()
-
-        row.cells[0].text = str(result.get("test_number", ""))
-        row.cells[1].text = result.get("input", "").strip() or "(нет)"
-        row.cells[2].text = result.get("stdout", "").strip() or "(нет вывода)"
+    # Данные. Оформление задаётся один раз на строке-образце; строки
+    # результатов — её копии, в которых меняется только текст ячеек
+    prototype = table.add_row()
+    for cell in prototype.cells:
+        cell.text = ""
+        for paragraph in cell.paragraphs:
+            for run in paragraph.runs:
+                run.font.name = font_name
+                run.font.size = Pt(font_size - 2)
+    prototype_tr = prototype._tr
 
+    for result in results:
         if result.get("error"):
-            row.cells[3].text = f"Ошибка: {result['error']}"
+            status = f"Ошибка: {result['error']}"
         elif result.get("returncode", 0) != 0:
-            row.cells[3].text = "Ошибка выполнения"
+            status = "Ошибка выполнения"
         else:
-            row.cells[3].text = "Успешно"
+            status = "Успешно"
+
+        texts = (
+            str(result.get("test_number", "")),
+            result.get("input", "").strip() or "(нет)",
+            result.get("stdout", "").strip() or "(нет вывода)",
+            status,
+        )
+        tr = copy.deepcopy(prototype_tr)
+        for r, text in zip(tr.iter(qn("w:r")), texts):
+            r.text = text
+        table._tbl.append(tr)
 
-        for cell in row.cells:
-            for paragraph in cell.paragraphs:
-                for run in paragraph.runs:
-                    run.font.name = font_name
-                    run.font.size = Pt(font_size - 2)
+    table._tbl.remove(prototype_tr)
 
     # Подпись таблицы
     p = doc.add_paragraph()
@@ -373,41 +522,54 @@ def _add_conclusion_section(doc, profile, analysis, test_results):
     font_name = profile.get("font_name", "Times New Roman")
     font_size = profile.get("font_size", 14)
 
-    heading = doc.add_heading("Выводы", level=1)
-    for run in heading.runs:
-        run.font.name = font_name
+    doc.add_heading("Выводы", level=1)
 
-    conclusion = (
+    parts = [
         f"В ходе выполнения лабораторной работы была разработана программа "
         f"на языке {analysis['language_display']}. "
-    )
+    ]
 
     if analysis.get("algorithms"):
         algorithms_text = ", ".join(analysis["algorithms"])
-        conclusion += (
+        parts.append(
             f"При реализации были использованы следующие алгоритмические "
             f"концепции: {algorithms_text}. "
         )
 
     if test_results and test_results.get("compiled"):
-        total = len(test_results.get("results", []))
+        results = test_results.get("results", [])
+        total = len(results)
         success = sum(
-            1 for r in test_results.get("results", [])
-            if r.get("returncode", -1) == 0 and not r.get("error")
+            r.get("returncode", -1) == 0 and not r.get("error")
+            for r in results
         )
-        conclusion += (
+        parts.append(
             f"Программа была протестирована с {total} набором(ами) тестовых данных. "
             f"Успешно пройдено тестов: {success} из {total}. "
         )
 
-    conclusion += "Цель работы достигнута."
+    parts.append("Цель работы достигнута.")
 
     p = doc.add_paragraph()
-    run = p.add_run(conclusion)
+    run = p.add_run("".join(parts))
     run.font.name = font_name
     run.font.size = Pt(font_size)
 
 
+def _default_output_path(analysis):
+    """Возвращает путь отчета по умолчанию: reports/report_<имя файла>.docx.
+
+    Args:
+        analysis: Результаты анализа кода.
+
+    Returns:
+        Путь к файлу отчета (директория создаётся при сохранении).
+    """
+    basename = os.path.splitext(analysis["filename"])[0]
+    output_dir = os.path.join(os.path.dirname(__file__), "..", "reports")
+    return os.path.join(output_dir, f"report_{basename}.docx")
+
+
 def generate_report(
     analysis,
     test_results=None,
@@ -426,14 +588,15 @@ def generate_report(
         flowchart_path: Путь к изображению блок-схемы.
         student_info: Словарь с данными студента (name, group, variant).
         profile_name: Имя профиля преподавателя.
-        output_path: Путь для сохранения .docx файла.
+        output_path: Путь для сохранения .docx файла или открытый
+            на запись двоичный поток (например, io.BytesIO).
         title_overrides: Переопределение полей титульной страницы
             (university, faculty, department).
         extra_tasks: Список дополнительных заданий. Каждый элемент — словарь
             с ключами 'analysis' и 'flowchart_path'.
 
     Returns:
-        Путь к сгенерированному файлу.
+        Путь к сгенерированному файлу (или переданный поток).
     """
     if student_info is None:
         student_info = {"name": "Студент", "group": "", "variant": ""}
@@ -448,6 +611,7 @@ def generate_report(
     ])
 
     doc = Document()
+    _set_heading_font(doc, profile.get("font_name", "Times New Roman"))
 
     # Настройка полей страницы
     margins = profile.get("margins", {})
@@ -493,15 +657,56 @@ def generate_report(
     if "conclusion" in sections:
         _add_conclusion_section(doc, profile, analysis, test_results)
 
+    # Поток: документ пишется в него без обращения к диску
+    if hasattr(output_path, "write"):
+        doc.save(output_path)
+        return output_path
+
     # Определяем путь сохранения
     if output_path is None:
-        basename = os.path.splitext(analysis["filename"])[0]
-        output_dir = os.path.join(os.path.dirname(__file__), "..", "reports")
-        os.makedirs(output_dir, exist_ok=True)
-        output_path = os.path.join(output_dir, f"report_{basename}.docx")
+        output_path = _default_output_path(analysis)
 
     output_path = os.path.abspath(output_path)
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     doc.save(output_path)
 
     return output_path
+
+
+def _generate_one(job):
+    """Генерирует один отчет по словарю аргументов generate_report.
+
+    Вынесено на уровень модуля, чтобы задание можно было передать
+    в дочерний процесс.
+
+    Args:
+        job: Словарь именованных аргументов generate_report.
+
+    Returns:
+        Путь к сгенерированному файлу.
+    """
+    return generate_report(**job)
+
+
+def generate_reports(jobs, max_workers=None):
+    """Генерирует несколько независимых отчетов параллельно.
+
+    Сборка документа — чисто вычислительная работа на Python (лексер,
+    построение XML, сжатие), поэтому отчеты распределяются по процессам,
+    а не по потокам.
+
+    Args:
+        jobs: Список словарей с именованными аргументами generate_report.
+        max_workers: Число процессов (по умолчанию — по числу ядер).
+
+    Returns:
+        Список путей к отчетам в порядке заданий.
+    """
+    jobs = list(jobs)
+    workers = max(1, min(max_workers or os.cpu_count() or 1, len(jobs)))
+    if workers == 1:
+        # Для одного отчета запуск процесса дороже самой генерации
+        return [_generate_one(job) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_generate_one, jobs))
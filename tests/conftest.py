@@ -0,0 +1,9 @@
+"""Общая настройка тестов."""
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "slow: медленные тесты (сборка .docx, таймауты); "
+        "пропустить: pytest -m \"not slow\"",
+    )
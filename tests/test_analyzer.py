@@ -42,6 +42,9 @@ class TestDetectLanguage:
     def test_case_insensitive(self):
         assert detect_language("Lab1.PAS") == "pascal"
 
+    def test_mixed_case(self):
+        assert detect_language("Main.Cpp") == "cpp"
+
     def test_path_with_directory(self):
         assert detect_language("/home/user/projects/lab1.py") == "python"
 
@@ -80,6 +83,23 @@ class TestExtractComments:
         comments = extract_comments(code, "pascal")
         assert "Это комментарий" in comments
 
+    def test_comments_in_source_order(self):
+        code = "(* первый *)\n{ второй }\n// третий"
+        comments = extract_comments(code, "pascal")
+        assert comments == ["первый", "второй", "третий"]
+
+    def test_markers_inside_block_comment_not_split(self):
+        code = '# note\n"""\nЦель: lab # inner\n"""\n'
+        assert extract_comments(code, "python") == ["note", "Цель: lab # inner"]
+        assert extract_comments("/* a // b */", "cpp") == ["a // b"]
+        assert extract_comments("{ c // d }", "pascal") == ["c // d"]
+
+    def test_large_file(self):
+        code = "{ комментарий }\nx := 1; // строка\n" * 5000
+        comments = extract_comments(code, "pascal")
+        assert len(comments) == 10000
+        assert comments[:2] == ["комментарий", "строка"]
+
     def test_no_comments(self):
         code = "x = 1\ny = 2"
         comments = extract_comments(code, "python")
@@ -104,6 +124,10 @@ class TestDetectAlgorithms:
         algos = detect_algorithms(code)
         assert "цикл" in algos
 
+    def test_overlapping_keywords(self):
+        algos = detect_algorithms("SORTEXT")
+        assert algos == ["сортировка", "строки"]
+
     def test_no_algorithms(self):
         code = "x = 1"
         algos = detect_algorithms(code)
@@ -114,20 +138,36 @@ class TestExtractPurpose:
     """Тесты определения цели работы."""
 
     def test_from_comment(self):
-        code = "# Цель: сортировка массива\nx = [3,1,2]"
-        purpose = extract_purpose(code, "python", "lab1.py")
+        comments = ["Цель: сортировка массива"]
+        purpose = extract_purpose(comments, "lab1.py")
         assert "сортировка" in purpose.lower()
 
     def test_from_filename(self):
-        code = "x = 1"
-        purpose = extract_purpose(code, "python", "lab1.py")
+        purpose = extract_purpose([], "lab1.py")
         assert "lab1" in purpose
 
     def test_first_comment_fallback(self):
-        code = "# Some description\nx = 1"
-        purpose = extract_purpose(code, "python", "lab1.py")
+        comments = ["Some description"]
+        purpose = extract_purpose(comments, "lab1.py")
         assert "Some description" in purpose
 
+    def test_keyword_case_insensitive(self):
+        comments = ["Автор: Иванов", "ЛАБОРАТОРНАЯ РАБОТА №3"]
+        purpose = extract_purpose(comments, "lab1.py")
+        assert purpose == "ЛАБОРАТОРНАЯ РАБОТА №3"
+
+    def test_keyword_comment_preferred(self):
+        comments = ["Автор: Иванов", "Задача: поиск максимума"]
+        purpose = extract_purpose(comments, "lab1.py")
+        assert purpose == "Задача: поиск максимума"
+
+    def test_docstring_before_hash_comment(self):
+        # Комментарии идут в порядке исходного кода, поэтому из двух
+        # подходящих выбирается первый по тексту, а не первый #-комментарий
+        code = '"""\nЦель: сортировка\n"""\n# Задача: поиск\n'
+        comments = extract_comments(code, "python")
+        assert extract_purpose(comments, "lab1.py") == "Цель: сортировка"
+
 
 class TestGetLanguageDisplayName:
     """Тесты отображаемых имён языков."""
@@ -168,6 +208,38 @@ class TestAnalyzeCode:
         finally:
             os.unlink(tmppath)
 
+    def test_repeated_analysis_returns_independent_copies(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", delete=False, encoding="utf-8"
+        ) as f:
+            f.write("# Задача: вывод\nprint(1)\n")
+            tmppath = f.name
+
+        try:
+            first = analyze_code(tmppath)
+            first["task_label"] = "Задание 1"
+            first["comments"].append("лишний")
+            second = analyze_code(tmppath)
+            assert "task_label" not in second
+            assert "лишний" not in second["comments"]
+        finally:
+            os.unlink(tmppath)
+
+    def test_changed_file_is_reanalyzed(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", delete=False, encoding="utf-8"
+        ) as f:
+            f.write("x = 1\n")
+            tmppath = f.name
+
+        try:
+            assert analyze_code(tmppath)["comments"] == []
+            with open(tmppath, "w", encoding="utf-8") as f:
+                f.write("# Новый комментарий\nx = 1\n")
+            assert analyze_code(tmppath)["comments"] == ["Новый комментарий"]
+        finally:
+            os.unlink(tmppath)
+
     def test_analyze_unsupported_raises(self):
         with tempfile.NamedTemporaryFile(
             mode="w", suffix=".js", delete=False
@@ -1,11 +1,10 @@
 """Тесты для CLI интерфейса."""
 
 import os
-import tempfile
 
 import pytest
 
-from codelab_assistant.cli import cmd_profiles, parse_args
+from codelab_assistant.cli import cmd_generate, cmd_profiles, parse_args
 
 
 class TestParseArgs:
@@ -74,6 +73,14 @@ class TestParseArgs:
         ])
         assert args.labels == ["Задание 1", "Задание 2"]
 
+    def test_repeated_parsing_is_independent(self):
+        first = parse_args(["generate", "a.py", "--test-data", "1"])
+        second = parse_args(["generate", "b.py"])
+        assert first.source_file == "a.py"
+        assert first.test_data == ["1"]
+        assert second.source_file == "b.py"
+        assert second.test_data == []
+
 
 class TestCmdProfiles:
     """Тесты команды profiles."""
@@ -84,3 +91,48 @@ class TestCmdProfiles:
         assert result == 0
         captured = capsys.readouterr()
         assert "default" in captured.out
+
+
+@pytest.mark.slow
+class TestCmdGenerate:
+    """Тесты команды generate."""
+
+    def test_generate_multiple_files(self, tmp_path, capsys):
+        paths = []
+        for name in ("task1.py", "task2.py"):
+            path = str(tmp_path / name)
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"# Задача: {name}\nprint(1)\n")
+            paths.append(path)
+        output = str(tmp_path / "report.docx")
+
+        args = parse_args([
+            "generate", paths[0],
+            "--extra-files", paths[1],
+            "--output", output,
+        ])
+        assert cmd_generate(args) == 0
+        assert os.path.exists(output)
+
+        captured = capsys.readouterr()
+        assert captured.out.index("task1.py") < captured.out.index("task2.py")
+
+    def test_generate_same_file_twice(self, tmp_path):
+        path = str(tmp_path / "task.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("x = int(input())\nprint(x)\n")
+        output = str(tmp_path / "report.docx")
+
+        args = parse_args([
+            "generate", path,
+            "--extra-files", path,
+            "--labels", "Задание 1", "Задание 2",
+            "--output", output,
+        ])
+        assert cmd_generate(args) == 0
+        assert os.path.exists(output)
+        assert (tmp_path / "report_task2_flowchart.mmd").exists()
+
+    def test_generate_missing_file(self, capsys):
+        args = parse_args(["generate", "/nonexistent/file.py"])
+        assert cmd_generate(args) == 1
@@ -1,11 +1,17 @@
 """Тесты для модуля выполнения кода."""
 
 import os
+import shutil
 import tempfile
 
 import pytest
 
-from codelab_assistant.executor import compile_code, run_program, run_tests
+from codelab_assistant.executor import (
+    compile_code,
+    run_program,
+    run_tests,
+    split_test_cases,
+)
 
 
 class TestCompileCode:
@@ -25,6 +31,19 @@ class TestCompileCode:
         finally:
             os.unlink(tmppath)
 
+    @pytest.mark.skipif(shutil.which("g++") is None, reason="g++ не найден")
+    def test_cpp_explicit_output_path(self, tmp_path):
+        source = str(tmp_path / "main.cpp")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("int main() { return 0; }\n")
+        output = str(tmp_path / "build" / "program")
+        os.makedirs(os.path.dirname(output))
+
+        executable, error = compile_code(source, "cpp", output)
+        assert error is None
+        assert executable == output
+        assert os.path.exists(output)
+
 
 class TestRunProgram:
     """Тесты запуска программ."""
@@ -58,6 +77,21 @@ class TestRunProgram:
         finally:
             os.unlink(tmppath)
 
+    @pytest.mark.slow
+    def test_run_timeout(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", delete=False, encoding="utf-8"
+        ) as f:
+            f.write("import time\ntime.sleep(10)")
+            tmppath = f.name
+
+        try:
+            result = run_program(tmppath, "python", timeout=0.5)
+            assert result["returncode"] == -1
+            assert "Превышено время выполнения" in result["error"]
+        finally:
+            os.unlink(tmppath)
+
     def test_run_nonexistent_file(self):
         result = run_program("/nonexistent/file.py", "python")
         # Python interpreter runs but reports error via stderr/returncode
@@ -82,3 +116,97 @@ class TestRunTests:
             assert "20" in results["results"][1]["stdout"]
         finally:
             os.unlink(tmppath)
+
+    def test_results_keep_input_order(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", delete=False, encoding="utf-8"
+        ) as f:
+            f.write("print(input())")
+            tmppath = f.name
+
+        try:
+            inputs = [f"{i}\n" for i in range(8)]
+            results = run_tests(tmppath, "python", inputs)
+            numbers = [r["test_number"] for r in results["results"]]
+            outputs = [r["stdout"].strip() for r in results["results"]]
+            assert numbers == list(range(1, 9))
+            assert outputs == [str(i) for i in range(8)]
+        finally:
+            os.unlink(tmppath)
+
+    def test_programs_run_in_callers_directory(self, tmp_path, monkeypatch):
+        (tmp_path / "input.txt").write_text("42", encoding="utf-8")
+        source = tmp_path / "reader.py"
+        source.write_text(
+            "print(open('input.txt').read())\n", encoding="utf-8"
+        )
+        monkeypatch.chdir(tmp_path)
+        results = run_tests("reader.py", "python", ["", ""])["results"]
+        assert [r["stdout"].strip() for r in results] == ["42", "42"]
+
+    def test_isolated_runs_use_separate_directories(self, tmp_path):
+        source = tmp_path / "files.py"
+        source.write_text(
+            "import os, time\n"
+            "value = input()\n"
+            "with open('data.txt', 'w') as f:\n"
+            "    f.write(value)\n"
+            "time.sleep(0.05)\n"
+            "with open('data.txt') as f:\n"
+            "    print(f.read(), os.getcwd())\n",
+            encoding="utf-8",
+        )
+        inputs = [f"{i}\n" for i in range(4)]
+        results = run_tests(str(source), "python", inputs, isolate=True)
+        lines = [r["stdout"].split() for r in results["results"]]
+        assert [line[0] for line in lines] == [str(i) for i in range(4)]
+        assert len({line[1] for line in lines}) == 4
+        assert not (tmp_path / "data.txt").exists()
+
+    def test_on_result_called_for_each_test(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", delete=False, encoding="utf-8"
+        ) as f:
+            f.write("print(input())")
+            tmppath = f.name
+
+        try:
+            reported = []
+            results = run_tests(
+                tmppath, "python", ["1\n", "2\n", "3\n"],
+                on_result=reported.append,
+            )
+            numbers = sorted(r["test_number"] for r in reported)
+            assert numbers == [1, 2, 3]
+            assert len(results["results"]) == 3
+        finally:
+            os.unlink(tmppath)
+
+    def test_no_test_cases(self):
+        with tempfile.NamedTemporaryFile(
+            mode="w", suffix=".py", delete=False, encoding="utf-8"
+        ) as f:
+            f.write("print(1)")
+            tmppath = f.name
+
+        try:
+            results = run_tests(tmppath, "python", [])
+            assert results["compiled"] is True
+            assert results["results"] == []
+        finally:
+            os.unlink(tmppath)
+
+
+class TestSplitTestCases:
+    """Тесты разбиения тестовых данных."""
+
+    def test_separator_lines(self):
+        text = "1 2 3\n---\n4 5 6\n---\n10 20 30\n"
+        assert split_test_cases(text) == ["1 2 3", "4 5 6", "10 20 30"]
+
+    def test_dashes_inside_data_kept(self):
+        assert split_test_cases("a---b\n---\nc") == ["a---b", "c"]
+
+    def test_crlf_and_empty_parts(self):
+        text = "1\r\n---\r\n\r\n---\r\n2\r\n"
+        assert split_test_cases(text) == ["1", "2"]
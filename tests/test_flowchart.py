@@ -1,19 +1,22 @@
 """Тесты для модуля генерации блок-схем."""
 
 import os
-import tempfile
+import shutil
 
 import pytest
 
 from codelab_assistant.flowchart import (
+    GRAPHVIZ_AVAILABLE,
+    _build_digraph,
     _extract_condition_label,
     _extract_io_label,
     _extract_loop_label,
-    _is_assignment,
     _is_condition,
     _is_io_statement,
     _is_loop,
     _parse_structure,
+    generate_flowchart,
+    generate_flowchart_and_mermaid,
     generate_mermaid_code,
     save_mermaid_code,
 )
@@ -22,87 +25,89 @@ from codelab_assistant.flowchart import (
 class TestIsIOStatement:
     """Тесты определения операций ввода/вывода."""
 
-    def test_python_print(self):
-        assert _is_io_statement("print('hello')", "python")
-
-    def test_python_input(self):
-        assert _is_io_statement("x = input()", "python")
-
-    def test_cpp_cout(self):
-        assert _is_io_statement("cout << x;", "cpp")
-
-    def test_cpp_cin(self):
-        assert _is_io_statement("cin >> x;", "cpp")
-
-    def test_pascal_writeln(self):
-        assert _is_io_statement("writeln('hello');", "pascal")
-
-    def test_pascal_readln(self):
-        assert _is_io_statement("readln(x);", "pascal")
-
-    def test_not_io(self):
-        assert not _is_io_statement("x = 1", "python")
+    @pytest.mark.parametrize("line, language, expected", [
+        ("print('hello')", "python", True),
+        ("x = input()", "python", True),
+        ("cout << x;", "cpp", True),
+        ("cin >> x;", "cpp", True),
+        ("writeln('hello');", "pascal", True),
+        ("readln(x);", "pascal", True),
+        ("x = 1", "python", False),
+    ])
+    def test_is_io_statement(self, line, language, expected):
+        assert bool(_is_io_statement(line, language)) is expected
 
 
 class TestIsCondition:
     """Тесты определения условных операторов."""
 
-    def test_python_if(self):
-        assert _is_condition("if x > 0:", "python")
-
-    def test_python_elif(self):
-        assert _is_condition("elif x < 0:", "python")
-
-    def test_cpp_if(self):
-        assert _is_condition("if (x > 0) {", "cpp")
-
-    def test_pascal_if(self):
-        assert _is_condition("if x > 0 then", "pascal")
-
-    def test_not_condition(self):
-        assert not _is_condition("x = 1", "python")
+    @pytest.mark.parametrize("line, language, expected", [
+        ("if x > 0:", "python", True),
+        ("elif x < 0:", "python", True),
+        ("if (x > 0) {", "cpp", True),
+        ("if x > 0 then", "pascal", True),
+        ("x = 1", "python", False),
+    ])
+    def test_is_condition(self, line, language, expected):
+        assert bool(_is_condition(line, language)) is expected
 
 
 class TestIsLoop:
     """Тесты определения циклов."""
 
-    def test_python_for(self):
-        assert _is_loop("for i in range(10):", "python")
+    @pytest.mark.parametrize("line, language, expected", [
+        ("for i in range(10):", "python", True),
+        ("while x > 0:", "python", True),
+        ("for (int i = 0; i < 10; i++) {", "cpp", True),
+        ("for i := 1 to 10 do", "pascal", True),
+        ("x = 1", "python", False),
+    ])
+    def test_is_loop(self, line, language, expected):
+        assert bool(_is_loop(line, language)) is expected
 
-    def test_python_while(self):
-        assert _is_loop("while x > 0:", "python")
 
-    def test_cpp_for(self):
-        assert _is_loop("for (int i = 0; i < 10; i++) {", "cpp")
+# Исходники для проверок структуры: каждый разбирается один раз на модуль
+_PARSE_CASES = {
+    "empty": ("", "python"),
+    "simple": ("x = int(input())\nprint(x * 2)", "python"),
+    "condition": ("x = 1\nif x > 0:\n    print(x)", "python"),
+}
 
-    def test_pascal_for(self):
-        assert _is_loop("for i := 1 to 10 do", "pascal")
 
-    def test_not_loop(self):
-        assert not _is_loop("x = 1", "python")
+@pytest.fixture(scope="module")
+def parsed_cases():
+    """Результаты _parse_structure для _PARSE_CASES."""
+    return {
+        name: _parse_structure(code, language)
+        for name, (code, language) in _PARSE_CASES.items()
+    }
 
 
 class TestParseStructure:
     """Тесты разбора структуры кода."""
 
-    def test_simple_python(self):
-        code = "x = int(input())\nprint(x * 2)"
-        nodes = _parse_structure(code, "python")
+    @pytest.mark.parametrize("case", list(_PARSE_CASES))
+    def test_start_and_end_always_present(self, parsed_cases, case):
+        nodes = parsed_cases[case]
         assert nodes[0]["type"] == "start"
         assert nodes[-1]["type"] == "end"
-        assert len(nodes) >= 3
 
-    def test_with_condition(self):
-        code = "x = 1\nif x > 0:\n    print(x)"
-        nodes = _parse_structure(code, "python")
-        types = [n["type"] for n in nodes]
+    def test_simple_python(self, parsed_cases):
+        assert len(parsed_cases["simple"]) >= 3
+
+    def test_with_condition(self, parsed_cases):
+        types = [n["type"] for n in parsed_cases["condition"]]
         assert "decision" in types
 
-    def test_start_and_end_always_present(self):
-        code = ""
+    def test_declarations_skipped(self):
+        code = "import sys\n# комментарий\ndef main():\n    x = 1"
         nodes = _parse_structure(code, "python")
-        assert nodes[0]["type"] == "start"
-        assert nodes[-1]["type"] == "end"
+        assert [n["label"] for n in nodes] == ["Начало", "x = 1", "Конец"]
+
+    def test_pascal_keywords_case_insensitive(self):
+        code = "PROGRAM Test;\nVAR x: integer;\nBEGIN\n  x := 1;\nEND."
+        nodes = _parse_structure(code, "pascal")
+        assert [n["label"] for n in nodes] == ["Начало", "x := 1", "Конец"]
 
 
 class TestExtractLabels:
@@ -125,6 +130,52 @@ class TestExtractLabels:
         assert "i in range(10)" in label
 
 
+@pytest.mark.skipif(not GRAPHVIZ_AVAILABLE, reason="graphviz не установлен")
+class TestBuildDigraph:
+    """Тесты построения графа graphviz."""
+
+    def test_nodes_and_edges(self):
+        nodes = _parse_structure("x = input()\nif x:\n    y = 1", "python")
+        source = _build_digraph(nodes).source
+        assert "n0 -> n1" in source
+        assert f"n{len(nodes) - 2} -> n{len(nodes) - 1}" in source
+        assert "shape=parallelogram" in source
+        assert "shape=diamond" in source
+        assert "shape=box" in source
+        assert "shape=ellipse" in source
+
+    def test_label_quoting(self):
+        nodes = [
+            {"type": "start", "label": "Начало"},
+            {"type": "process", "label": 's = "a"'},
+            {"type": "end", "label": "Конец"},
+        ]
+        source = _build_digraph(nodes).source
+        assert 'label="s = \\"a\\""' in source
+
+
+@pytest.mark.skipif(
+    not GRAPHVIZ_AVAILABLE or shutil.which("dot") is None,
+    reason="Graphviz не установлен",
+)
+class TestGenerateFlowchart:
+    """Тесты построения изображения блок-схемы."""
+
+    def test_repeated_call_reuses_image(self):
+        code = "x = int(input())\nprint(x)"
+        first = generate_flowchart(code, "python")
+        assert first is not None
+        assert generate_flowchart(code, "python") == first
+
+    def test_removed_image_is_rendered_again(self):
+        code = "y = int(input())\nprint(y * 2)"
+        first = generate_flowchart(code, "python")
+        os.remove(first)
+        second = generate_flowchart(code, "python")
+        assert second is not None
+        assert os.path.exists(second)
+
+
 class TestGenerateMermaidCode:
     """Тесты генерации Mermaid-кода."""
 
@@ -140,6 +191,15 @@ class TestGenerateMermaidCode:
         mermaid = generate_mermaid_code("", "python")
         assert mermaid is None
 
+    def test_declarations_only_returns_none(self):
+        code = "import os\nfrom sys import argv\n# комментарий"
+        assert generate_mermaid_code(code, "python") is None
+
+    def test_print_only_code(self):
+        mermaid = generate_mermaid_code("print(1)", "python")
+        assert mermaid is not None
+        assert "Вывод" in mermaid
+
     def test_mermaid_contains_io_nodes(self):
         code = "x = input()\nprint(x)"
         mermaid = generate_mermaid_code(code, "python")
@@ -172,25 +232,33 @@ class TestGenerateMermaidCode:
         assert "flowchart TD" in mermaid
 
 
+class TestGenerateFlowchartAndMermaid:
+    """Тесты совместной генерации блок-схемы и Mermaid-кода."""
+
+    def test_mermaid_matches_separate_call(self):
+        code = "x = int(input())\nif x > 0:\n    print(x)"
+        _, mermaid = generate_flowchart_and_mermaid(code, "python")
+        assert mermaid == generate_mermaid_code(code, "python")
+
+    def test_nothing_to_draw(self):
+        assert generate_flowchart_and_mermaid("import os", "python") == (None, None)
+
+
 class TestSaveMermaidCode:
     """Тесты сохранения Mermaid-кода."""
 
-    def test_save_creates_file(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = os.path.join(tmpdir, "test.mmd")
-            result = save_mermaid_code("flowchart TD\n    n0 --> n1", path)
-            assert result == path
-            assert os.path.exists(path)
-            with open(path, "r", encoding="utf-8") as f:
-                content = f.read()
-            assert "flowchart TD" in content
-
-    def test_save_none_returns_none(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            result = save_mermaid_code(None, os.path.join(tmpdir, "test.mmd"))
-            assert result is None
-
-    def test_save_empty_returns_none(self):
-        with tempfile.TemporaryDirectory() as tmpdir:
-            result = save_mermaid_code("", os.path.join(tmpdir, "test.mmd"))
-            assert result is None
+    def test_save_creates_file(self, tmp_path):
+        path = str(tmp_path / "test.mmd")
+        result = save_mermaid_code("flowchart TD\n    n0 --> n1", path)
+        assert result == path
+        assert os.path.exists(path)
+        with open(path, "rb") as f:
+            assert f.read(12) == b"flowchart TD"
+
+    def test_save_none_returns_none(self, tmp_path):
+        result = save_mermaid_code(None, str(tmp_path / "test.mmd"))
+        assert result is None
+
+    def test_save_empty_returns_none(self, tmp_path):
+        result = save_mermaid_code("", str(tmp_path / "test.mmd"))
+        assert result is None
@@ -1,9 +1,5 @@
 """Тесты для модуля профилей преподавателей."""
 
-import json
-import os
-import tempfile
-
 import pytest
 
 from codelab_assistant.profiles import (
@@ -15,6 +11,15 @@ from codelab_assistant.profiles import (
 )
 
 
+@pytest.fixture(autouse=True)
+def profiles_dir(tmp_path, monkeypatch):
+    """Каталог профилей во временной директории теста."""
+    monkeypatch.setattr(
+        "codelab_assistant.profiles.PROFILES_DIR", str(tmp_path)
+    )
+    return tmp_path
+
+
 class TestDefaultProfile:
     """Тесты профиля по умолчанию."""
 
@@ -48,6 +53,36 @@ class TestLoadProfile:
         profile = load_profile("nonexistent_profile_xyz")
         assert profile["font_name"] == DEFAULT_PROFILE["font_name"]
 
+    def test_nested_changes_do_not_affect_default(self):
+        profile = load_profile("default")
+        profile["margins"]["top_cm"] = 5.0
+        profile["sections"].append("extra")
+        assert DEFAULT_PROFILE["margins"]["top_cm"] == 2.0
+        assert "extra" not in DEFAULT_PROFILE["sections"]
+
+    def test_partial_nested_fields_are_merged(self):
+        save_profile("test_partial_xyz", {"title_page": {"university": "МГУ"}})
+        profile = load_profile("test_partial_xyz")
+        assert profile["title_page"]["university"] == "МГУ"
+        assert profile["title_page"]["faculty"] == "Факультет"
+
+    def test_invalid_field_types_fall_back_to_default(self):
+        data = {
+            "font_size": "big",
+            "page_numbers": 1,
+            "sections": ["listing", 5],
+            "margins": {"top_cm": None, "left_cm": 2.5},
+            "display_name": "Свой",
+        }
+        save_profile("test_invalid_xyz", data)
+        profile = load_profile("test_invalid_xyz")
+        assert profile["font_size"] == DEFAULT_PROFILE["font_size"]
+        assert profile["page_numbers"] is True
+        assert profile["sections"] == DEFAULT_PROFILE["sections"]
+        assert profile["margins"]["top_cm"] == 2.0
+        assert profile["margins"]["left_cm"] == 2.5
+        assert profile["display_name"] == "Свой"
+
 
 class TestSaveAndDeleteProfile:
     """Тесты сохранения и удаления профилей."""
@@ -58,13 +93,21 @@ class TestSaveAndDeleteProfile:
         test_profile["font_name"] = "Arial"
         test_profile["font_size"] = 12
 
-        try:
-            save_profile("test_teacher", test_profile)
-            loaded = load_profile("test_teacher")
-            assert loaded["font_name"] == "Arial"
-            assert loaded["font_size"] == 12
-        finally:
-            delete_profile("test_teacher")
+        save_profile("test_teacher", test_profile)
+        loaded = load_profile("test_teacher")
+        assert loaded["font_name"] == "Arial"
+        assert loaded["font_size"] == 12
+
+    def test_resave_is_picked_up(self):
+        save_profile("test_resave_xyz", {"font_size": 12})
+        assert load_profile("test_resave_xyz")["font_size"] == 12
+        save_profile("test_resave_xyz", {"font_size": 16})
+        assert load_profile("test_resave_xyz")["font_size"] == 16
+
+    def test_loaded_copies_are_independent(self):
+        save_profile("test_copy_xyz", {"font_size": 12})
+        load_profile("test_copy_xyz")["margins"]["top_cm"] = 9.0
+        assert load_profile("test_copy_xyz")["margins"]["top_cm"] == 2.0
 
     def test_delete_default_fails(self):
         assert delete_profile("default") is False
@@ -79,3 +122,15 @@ class TestListProfiles:
     def test_includes_default(self):
         profiles = list_profiles()
         assert "default" in profiles
+
+    def test_reflects_saved_and_deleted(self):
+        assert "test_list_xyz" not in list_profiles()
+        save_profile("test_list_xyz", DEFAULT_PROFILE.copy())
+        assert "test_list_xyz" in list_profiles()
+        delete_profile("test_list_xyz")
+        assert "test_list_xyz" not in list_profiles()
+
+    def test_returns_independent_list(self):
+        profiles = list_profiles()
+        profiles.append("mutated")
+        assert "mutated" not in list_profiles()
@@ -1,58 +1,86 @@
 """Тесты для модуля генерации отчетов."""
 
+import io
 import os
-import tempfile
+from types import MappingProxyType
 
 import pytest
+from docx import Document
+from docx.shared import RGBColor
+from pygments.token import Keyword, Name, Number, Text
 
-from codelab_assistant.report_generator import generate_report
+from codelab_assistant.profiles import save_profile
+from codelab_assistant.report_generator import (
+    _default_output_path,
+    _get_lexer,
+    _token_style,
+    _tokenize,
+    generate_report,
+    generate_reports,
+)
 
 
-class TestGenerateReport:
-    """Тесты генерации отчетов."""
+# Тестовые данные анализа. Только для чтения: тесты, которым нужны
+# другие поля, собирают новый словарь через {**_ANALYSIS, ...}
+_ANALYSIS = MappingProxyType({
+    "language": "python",
+    "language_display": "Python",
+    "comments": ["Тестовая программа"],
+    "algorithms": ["цикл"],
+    "purpose": "Тестирование генерации отчета",
+    "code": "# Тестовая программа\nfor i in range(10):\n    print(i)\n",
+    "filename": "test_program.py",
+})
 
-    def _make_analysis(self):
-        """Создает тестовые данные анализа."""
-        return {
-            "language": "python",
-            "language_display": "Python",
-            "comments": ["Тестовая программа"],
-            "algorithms": ["цикл"],
-            "purpose": "Тестирование генерации отчета",
-            "code": "# Тестовая программа\nfor i in range(10):\n    print(i)\n",
-            "filename": "test_program.py",
-        }
 
-    def test_generate_report_creates_file(self):
-        analysis = self._make_analysis()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                output_path=output,
-            )
-            assert os.path.exists(result)
-            assert result.endswith(".docx")
-
-    def test_generate_with_student_info(self):
-        analysis = self._make_analysis()
-        student = {
+@pytest.fixture(scope="module")
+def report_dir(tmp_path_factory):
+    """Общий каталог для отчетов, которые строятся один раз на модуль."""
+    return tmp_path_factory.mktemp("reports")
+
+
+def _build_report(report_dir, name, **kwargs):
+    """Генерирует отчет по тестовому анализу в общий каталог."""
+    return generate_report(
+        analysis=_ANALYSIS,
+        output_path=str(report_dir / f"{name}.docx"),
+        **kwargs,
+    )
+
+
+@pytest.fixture(scope="module")
+def baseline_report(report_dir):
+    """Отчет с параметрами по умолчанию."""
+    return _build_report(report_dir, "baseline")
+
+
+@pytest.fixture(scope="module")
+def baseline_doc(baseline_report):
+    """Разобранный отчет с параметрами по умолчанию (только для чтения)."""
+    return Document(baseline_report)
+
+
+@pytest.fixture(scope="module")
+def student_report(report_dir):
+    """Отчет с данными студента."""
+    return _build_report(
+        report_dir,
+        "student",
+        student_info={
             "name": "Иванов Иван Иванович",
             "group": "ИТ-21",
             "variant": "5",
-        }
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                student_info=student,
-                output_path=output,
-            )
-            assert os.path.exists(result)
-
-    def test_generate_with_test_results(self):
-        analysis = self._make_analysis()
-        test_results = {
+        },
+    )
+
+
+@pytest.fixture(scope="module")
+def tested_report(report_dir):
+    """Отчет с результатами тестирования."""
+    return _build_report(
+        report_dir,
+        "tested",
+        test_results={
             "compiled": True,
             "compile_error": None,
             "results": [
@@ -65,90 +93,178 @@ class TestGenerateReport:
                     "error": None,
                 },
             ],
-        }
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                test_results=test_results,
-                output_path=output,
-            )
-            assert os.path.exists(result)
-
-    def test_generate_with_compile_error(self):
-        analysis = self._make_analysis()
-        test_results = {
+        },
+    )
+
+
+@pytest.fixture(scope="module")
+def compile_error_report(report_dir):
+    """Отчет для программы с ошибкой компиляции."""
+    return _build_report(
+        report_dir,
+        "compile_error",
+        test_results={
             "compiled": False,
             "compile_error": "Syntax error",
             "results": [],
-        }
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                test_results=test_results,
-                output_path=output,
-            )
-            assert os.path.exists(result)
-
-    def test_generate_without_test_results(self):
-        analysis = self._make_analysis()
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                test_results=None,
-                output_path=output,
-            )
-            assert os.path.exists(result)
+        },
+    )
 
-    def test_default_output_path(self):
-        analysis = self._make_analysis()
-        result = generate_report(analysis=analysis)
+
+@pytest.mark.slow
+class TestGenerateReport:
+    """Тесты генерации отчетов."""
+
+    @pytest.mark.parametrize("report_fixture", [
+        "baseline_report",
+        "student_report",
+        "tested_report",
+        "compile_error_report",
+    ])
+    def test_generate_report_creates_file(self, request, report_fixture):
+        # Отчет по умолчанию (baseline) строится без результатов тестов
+        result = request.getfixturevalue(report_fixture)
         assert os.path.exists(result)
-        assert "report_test_program.docx" in result
-        # Cleanup
-        os.unlink(result)
+        assert result.endswith(".docx")
+
+    def test_default_output_path(self):
+        result = _default_output_path(_ANALYSIS)
+        assert os.path.basename(result) == "report_test_program.docx"
+        assert os.path.basename(os.path.dirname(result)) == "reports"
 
-    def test_generate_with_title_overrides(self):
-        analysis = self._make_analysis()
-        overrides = {
+    @pytest.mark.parametrize("analysis_update, kwargs", [
+        ({}, {"title_overrides": {
             "university": "МГУ им. Ломоносова",
             "faculty": "Факультет ВМК",
             "department": "Кафедра информатики",
+        }}),
+        ({}, {"extra_tasks": [{
+            "analysis": {
+                **_ANALYSIS,
+                "filename": "task2.py",
+                "task_label": "Задание 2",
+            },
+            "flowchart_path": None,
+        }]}),
+        ({"task_label": "Задание 1"}, {}),
+    ], ids=["title_overrides", "extra_tasks", "task_label"])
+    def test_generate_variants(self, analysis_update, kwargs):
+        analysis = {**_ANALYSIS, **analysis_update}
+        output = io.BytesIO()
+        result = generate_report(
+            analysis=analysis,
+            output_path=output,
+            **kwargs,
+        )
+        assert result is output
+        assert output.getvalue()[:2] == b"PK"
+
+    def test_missing_flowchart_file(self, tmp_path):
+        output = str(tmp_path / "test_report.docx")
+        result = generate_report(
+            analysis=_ANALYSIS,
+            flowchart_path=str(tmp_path / "missing.png"),
+            output_path=output,
+        )
+        doc = Document(result)
+        assert not doc.inline_shapes
+        assert any(
+            p.text.startswith("Блок-схема не была сгенерирована")
+            for p in doc.paragraphs
+        )
+
+    def test_heading_font_set_in_style(self, baseline_doc):
+        style = baseline_doc.styles["Heading 1"]
+        assert style.font.name == "Times New Roman"
+        assert "asciiTheme" not in style.element.rPr.rFonts.xml
+        headings = [
+            p for p in baseline_doc.paragraphs if p.style.name == "Heading 1"
+        ]
+        assert headings
+        assert all(r.font.name is None for p in headings for r in p.runs)
+
+    def test_listing_runs_merged_by_style(self, baseline_doc):
+        code = _ANALYSIS["code"]
+        listing = next(p for p in baseline_doc.paragraphs if p.text == code)
+        styles = [(r.font.color.rgb, r.bold) for r in listing.runs]
+        assert all(a != b for a, b in zip(styles, styles[1:]))
+
+    def test_listing_without_highlighting(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(
+            "codelab_assistant.profiles.PROFILES_DIR", str(tmp_path)
+        )
+        save_profile("test_plain_xyz", {"highlight_code": False})
+        output = str(tmp_path / "test_report.docx")
+        result = generate_report(
+            analysis=_ANALYSIS,
+            output_path=output,
+            profile_name="test_plain_xyz",
+        )
+        doc = Document(result)
+        listing = next(p for p in doc.paragraphs if p.text == _ANALYSIS["code"])
+        assert len(listing.runs) == 1
+        assert listing.runs[0].font.name == "Courier New"
+
+
+@pytest.mark.slow
+class TestGenerateReports:
+    """Тесты пакетной генерации отчетов."""
+
+    def _make_job(self, tmp_path, name):
+        analysis = {**_ANALYSIS, "filename": f"{name}.py"}
+        return {
+            "analysis": analysis,
+            "output_path": str(tmp_path / f"{name}.docx"),
         }
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                output_path=output,
-                title_overrides=overrides,
-            )
-            assert os.path.exists(result)
-
-    def test_generate_with_extra_tasks(self):
-        analysis = self._make_analysis()
-        extra_analysis = self._make_analysis()
-        extra_analysis["filename"] = "task2.py"
-        extra_analysis["task_label"] = "Задание 2"
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                output_path=output,
-                extra_tasks=[
-                    {"analysis": extra_analysis, "flowchart_path": None},
-                ],
-            )
-            assert os.path.exists(result)
-
-    def test_generate_with_task_label(self):
-        analysis = self._make_analysis()
-        analysis["task_label"] = "Задание 1"
-        with tempfile.TemporaryDirectory() as tmpdir:
-            output = os.path.join(tmpdir, "test_report.docx")
-            result = generate_report(
-                analysis=analysis,
-                output_path=output,
-            )
-            assert os.path.exists(result)
+
+    def test_reports_in_job_order(self, tmp_path):
+        jobs = [self._make_job(tmp_path, f"student{i}") for i in range(3)]
+        result = generate_reports(jobs, max_workers=2)
+        assert result == [os.path.abspath(j["output_path"]) for j in jobs]
+        assert all(os.path.exists(path) for path in result)
+
+    def test_single_job_runs_inline(self, tmp_path):
+        job = self._make_job(tmp_path, "single")
+        result = generate_reports([job])
+        assert result == [os.path.abspath(job["output_path"])]
+
+    def test_empty_jobs(self):
+        assert generate_reports([]) == []
+
+
+class TestGetLexer:
+    """Тесты выбора лексера."""
+
+    def test_lexer_reused(self):
+        assert _get_lexer("pascal") is _get_lexer("pascal")
+
+    def test_unknown_language_falls_back_to_python(self):
+        assert _get_lexer("unknown").name == _get_lexer("python").name
+
+
+class TestTokenize:
+    """Тесты разбиения кода на токены."""
+
+    def test_tokens_cover_code(self):
+        code = "x = 1\nprint(x)\n"
+        assert "".join(text for _, text in _tokenize("python", code)) == code
+
+    def test_repeated_call_cached(self):
+        code = "begin\n  writeln(1);\nend.\n"
+        assert _tokenize("pascal", code) is _tokenize("pascal", code)
+
+
+class TestTokenStyle:
+    """Тесты оформления токенов листинга."""
+
+    def test_keyword_subtype_blue_and_bold(self):
+        assert _token_style(Keyword.Declaration) == (RGBColor(0, 0, 255), True)
+
+    def test_function_name(self):
+        assert _token_style(Name.Function) == (RGBColor(128, 0, 0), False)
+
+    def test_number_uses_literal_color(self):
+        assert _token_style(Number.Integer) == (RGBColor(163, 21, 21), False)
+
+    def test_plain_text_black(self):
+        assert _token_style(Text) == (RGBColor(0, 0, 0), False)